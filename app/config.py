@@ -14,16 +14,106 @@ class Settings(BaseSettings):
     SECRET_KEY: str = os.getenv("SECRET_KEY", "09d25e094faa6ca2556c818166b7a9563b93f7099f6f0f4caa6cf63b88e8d3e7")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24  # 24 hours
+    USER_CACHE_TTL_SECONDS: int = int(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+    USER_CACHE_MAX_SIZE: int = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
     ALLOWED_ORIGIN: str = os.getenv("ALLOWED_ORIGIN", "http://localhost:3000")
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))  # Threads running bcrypt
+    PASSWORD_HASH_MAX_QUEUE: int = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "32"))  # Waiting operations before 503
+    
+    # Rate limits per user (or per client IP when unauthenticated); 0 disables a limit
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    RATE_LIMIT_CHAT_PER_MINUTE: int = int(os.getenv("RATE_LIMIT_CHAT_PER_MINUTE", "20"))  # /chat and /chat/stream combined
+    RATE_LIMIT_LOGIN_PER_MINUTE: int = int(os.getenv("RATE_LIMIT_LOGIN_PER_MINUTE", "10"))
+    RATE_LIMIT_REGISTER_PER_HOUR: int = int(os.getenv("RATE_LIMIT_REGISTER_PER_HOUR", "10"))
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory")  # "memory" or "redis" to share counters between workers
+    RATE_LIMIT_REDIS_URL: str = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+    RATE_LIMIT_MAX_KEYS: int = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))  # Callers tracked by the in-memory backend
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = os.getenv("RATE_LIMIT_TRUST_FORWARDED_FOR", "false").lower() == "true"  # Behind a trusted proxy only
     
     # Database settings
     MONGODB_URI: str = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
     DATABASE_NAME: str = "god_talk"
+    MONGODB_ENSURE_INDEXES: bool = os.getenv("MONGODB_ENSURE_INDEXES", "true").lower() == "true"  # Create indexes on startup
+    MONGODB_MAX_POOL_SIZE: int = int(os.getenv("MONGODB_MAX_POOL_SIZE", "100"))  # Connections per worker
+    MONGODB_MIN_POOL_SIZE: int = int(os.getenv("MONGODB_MIN_POOL_SIZE", "0"))
+    MONGODB_MAX_IDLE_TIME_MS: int = int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", "300000"))  # Close pooled connections idle this long
+    MONGODB_CONNECT_TIMEOUT_MS: int = int(os.getenv("MONGODB_CONNECT_TIMEOUT_MS", "10000"))
+    MONGODB_SOCKET_TIMEOUT_MS: int = int(os.getenv("MONGODB_SOCKET_TIMEOUT_MS", "30000"))  # 0 disables the timeout
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "10000"))
+    
+    # LLM provider: "openai", or "fake" for a local deterministic stand-in used in load tests
+    LLM_PROVIDER: str = os.getenv("LLM_PROVIDER", "openai")
+    FAKE_LLM_LATENCY_MS: float = float(os.getenv("FAKE_LLM_LATENCY_MS", "300"))  # Delay before the first token
+    FAKE_LLM_TOKENS_PER_SECOND: float = float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", "50"))
+    FAKE_LLM_RESPONSE_TOKENS: int = int(os.getenv("FAKE_LLM_RESPONSE_TOKENS", "120"))
+    LLM_COALESCE_REQUESTS: bool = os.getenv("LLM_COALESCE_REQUESTS", "true").lower() == "true"  # Share one call between identical concurrent prompts
     
     # OpenAI API settings
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
     OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
     
+    # HTTP client settings for calls to the OpenAI API (timeouts in seconds)
+    OPENAI_HTTP_MAX_CONNECTIONS: int = int(os.getenv("OPENAI_HTTP_MAX_CONNECTIONS", "100"))
+    OPENAI_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("OPENAI_HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    OPENAI_HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("OPENAI_HTTP_KEEPALIVE_EXPIRY", "30"))
+    OPENAI_HTTP_CONNECT_TIMEOUT: float = float(os.getenv("OPENAI_HTTP_CONNECT_TIMEOUT", "5"))
+    OPENAI_HTTP_READ_TIMEOUT: float = float(os.getenv("OPENAI_HTTP_READ_TIMEOUT", "60"))
+    OPENAI_HTTP_WRITE_TIMEOUT: float = float(os.getenv("OPENAI_HTTP_WRITE_TIMEOUT", "10"))
+    OPENAI_HTTP_POOL_TIMEOUT: float = float(os.getenv("OPENAI_HTTP_POOL_TIMEOUT", "5"))
+    OPENAI_HTTP2: bool = os.getenv("OPENAI_HTTP2", "false").lower() == "true"  # Requires the h2 package
+    
+    # Retries and circuit breaker for LLM calls
+    LLM_ATTEMPT_TIMEOUT_SECONDS: float = float(os.getenv("LLM_ATTEMPT_TIMEOUT_SECONDS", "30"))  # Per attempt; time to first token when streaming
+    LLM_MAX_ATTEMPTS: int = int(os.getenv("LLM_MAX_ATTEMPTS", "3"))
+    LLM_RETRY_BASE_DELAY_SECONDS: float = float(os.getenv("LLM_RETRY_BASE_DELAY_SECONDS", "0.5"))
+    LLM_RETRY_MAX_DELAY_SECONDS: float = float(os.getenv("LLM_RETRY_MAX_DELAY_SECONDS", "8"))  # Longer Retry-After values are not waited for
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "5"))  # Consecutive failures that open the circuit
+    LLM_CIRCUIT_RESET_SECONDS: float = float(os.getenv("LLM_CIRCUIT_RESET_SECONDS", "30"))  # How long the circuit stays open
+    
+    # Admission control for LLM calls (a per-minute limit of 0 disables it)
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "50"))  # LLM calls in flight per worker
+    LLM_REQUESTS_PER_MINUTE: float = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "0"))
+    LLM_TOKENS_PER_MINUTE: float = float(os.getenv("LLM_TOKENS_PER_MINUTE", "0"))  # Prompt plus max completion tokens
+    LLM_ADMISSION_MAX_QUEUE: int = int(os.getenv("LLM_ADMISSION_MAX_QUEUE", "100"))  # Waiting calls before 503
+    LLM_ADMISSION_MAX_WAIT_SECONDS: float = float(os.getenv("LLM_ADMISSION_MAX_WAIT_SECONDS", "10"))
+    
+    # God and question catalogue caches
+    GOD_CATALOG_TTL_SECONDS: int = int(os.getenv("GOD_CATALOG_TTL_SECONDS", "300"))
+    QUESTION_CATALOG_TTL_SECONDS: int = int(os.getenv("QUESTION_CATALOG_TTL_SECONDS", "300"))
+    CATALOG_CACHE_MAX_AGE_SECONDS: int = int(os.getenv("CATALOG_CACHE_MAX_AGE_SECONDS", "300"))  # Cache-Control max-age for gods and questions
+    
+    # Chat settings
+    MESSAGE_PAGE_DEFAULT_SIZE: int = int(os.getenv("MESSAGE_PAGE_DEFAULT_SIZE", "50"))
+    MESSAGE_PAGE_MAX_SIZE: int = int(os.getenv("MESSAGE_PAGE_MAX_SIZE", "200"))
+    CONVERSATION_DETAIL_MESSAGE_LIMIT: int = int(os.getenv("CONVERSATION_DETAIL_MESSAGE_LIMIT", "0"))  # Latest messages in GET /conversations/{id}; 0 returns all
+    CHAT_HISTORY_WINDOW: int = int(os.getenv("CHAT_HISTORY_WINDOW", "20"))  # Most recent messages read per turn
+    CHAT_CONTEXT_TOKEN_BUDGET: int = int(os.getenv("CHAT_CONTEXT_TOKEN_BUDGET", "1500"))  # Prompt tokens, system prompt included
+    CHAT_SUMMARY_ENABLED: bool = os.getenv("CHAT_SUMMARY_ENABLED", "true").lower() == "true"  # Keep a rolling summary of long conversations
+    CHAT_SUMMARY_KEEP_RECENT: int = int(os.getenv("CHAT_SUMMARY_KEEP_RECENT", "10"))  # Newest messages left out of the summary; at most CHAT_HISTORY_WINDOW - 1
+    CHAT_SUMMARY_BATCH_MESSAGES: int = int(os.getenv("CHAT_SUMMARY_BATCH_MESSAGES", "50"))  # Most messages folded in per pass
+    CHAT_SUMMARY_MAX_TOKENS: int = int(os.getenv("CHAT_SUMMARY_MAX_TOKENS", "300"))
+    
+    # Write god replies from a background queue instead of before responding (replies still queued are lost if the process dies)
+    REPLY_WRITE_BEHIND_ENABLED: bool = os.getenv("REPLY_WRITE_BEHIND_ENABLED", "false").lower() == "true"
+    REPLY_WRITE_BEHIND_BATCH_SIZE: int = int(os.getenv("REPLY_WRITE_BEHIND_BATCH_SIZE", "100"))
+    REPLY_WRITE_BEHIND_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("REPLY_WRITE_BEHIND_FLUSH_INTERVAL_SECONDS", "0.05"))  # Longest wait for a batch to fill
+    REPLY_WRITE_BEHIND_MAX_QUEUE: int = int(os.getenv("REPLY_WRITE_BEHIND_MAX_QUEUE", "10000"))  # Replies beyond this are written synchronously
+    REPLY_WRITE_BEHIND_MAX_ATTEMPTS: int = int(os.getenv("REPLY_WRITE_BEHIND_MAX_ATTEMPTS", "5"))
+    REPLY_WRITE_BEHIND_DRAIN_TIMEOUT_SECONDS: float = float(os.getenv("REPLY_WRITE_BEHIND_DRAIN_TIMEOUT_SECONDS", "10"))
+    
+    # Cache of replies to the suggested questions, used for the first message of a conversation
+    ANSWER_CACHE_ENABLED: bool = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+    ANSWER_CACHE_TTL_SECONDS: int = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", "86400"))
+    ANSWER_CACHE_MAX_SIZE: int = int(os.getenv("ANSWER_CACHE_MAX_SIZE", "5000"))
+    ANSWER_CACHE_WARM_ON_STARTUP: bool = os.getenv("ANSWER_CACHE_WARM_ON_STARTUP", "false").lower() == "true"  # Calls the LLM for every question
+    ANSWER_CACHE_WARM_CONCURRENCY: int = int(os.getenv("ANSWER_CACHE_WARM_CONCURRENCY", "4"))
+    
+    # Semantic cache matching rewordings of the suggested questions (requires numpy and sentence-transformers)
+    SEMANTIC_CACHE_ENABLED: bool = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+    SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))  # Minimum cosine similarity for a hit
+    SEMANTIC_CACHE_MAX_ENTRIES_PER_GOD: int = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES_PER_GOD", "2000"))
+    SEMANTIC_CACHE_MODEL: str = os.getenv("SEMANTIC_CACHE_MODEL", "")  # Local sentence-transformers model; required when enabled
+    
     class Config:
         env_file = ".env"
 
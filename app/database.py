@@ -1,9 +1,38 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from app.config import settings
+from app.middleware import MongoCommandMetrics
 
-client = AsyncIOMotorClient(settings.MONGODB_URI)
-db = client[settings.DATABASE_NAME]
+# The client is created by the FastAPI lifespan handler (see main.py) so that
+# pool settings come from Settings and the pool is closed cleanly on shutdown
+client = None
+db = None
+
+def connect_to_mongo():
+    global client, db
+    if client is None:
+        client = AsyncIOMotorClient(
+            settings.MONGODB_URI,
+            maxPoolSize=settings.MONGODB_MAX_POOL_SIZE,
+            minPoolSize=settings.MONGODB_MIN_POOL_SIZE,
+            maxIdleTimeMS=settings.MONGODB_MAX_IDLE_TIME_MS,
+            connectTimeoutMS=settings.MONGODB_CONNECT_TIMEOUT_MS,
+            socketTimeoutMS=settings.MONGODB_SOCKET_TIMEOUT_MS,
+            serverSelectionTimeoutMS=settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+            event_listeners=[MongoCommandMetrics()],
+        )
+        db = client[settings.DATABASE_NAME]
+    return db
+
+def close_mongo_connection():
+    global client, db
+    if client is not None:
+        client.close()
+    client = None
+    db = None
 
 # Dependency for FastAPI
 async def get_database():
-    return db
\ No newline at end of file
+    # Connect lazily if the app is used without running its lifespan handler
+    if db is None:
+        return connect_to_mongo()
+    return db
@@ -1,16 +1,24 @@
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
+from bson import ObjectId
 from datetime import datetime, timedelta
 from typing import Optional
 import logging
 
+from app.cache import TTLCache
 from app.database import get_database
 from app.schemas import TokenData, User as UserSchema
 from app.config import settings
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Recently authenticated users keyed by token subject (username), so that most
+# authenticated requests need no database round trip to resolve the caller.
+# Nothing updates or deactivates users yet; once something does, a cached user
+# can be stale for up to USER_CACHE_TTL_SECONDS unless it is popped here.
+user_cache = TTLCache(maxsize=settings.USER_CACHE_MAX_SIZE, ttl_seconds=settings.USER_CACHE_TTL_SECONDS)
+
 # Set up logging (keeping import but not using logger instances)
 logging.basicConfig(level=logging.INFO)
 # logger = logging.getLogger(__name__)
@@ -37,6 +45,26 @@ def user_doc_to_schema(doc):
         created_at=doc.get("created_at", datetime.utcnow()),
     )
 
+async def get_user_from_token_payload(db, payload: dict):
+    """
+    Resolve the user a decoded token refers to, using the identity cache first.
+    Tokens that carry a `uid` claim are looked up by _id, older tokens by username.
+    """
+    username = payload.get("sub")
+    cached_user = user_cache.get(username)
+    if cached_user is not None:
+        return cached_user
+    user_id = payload.get("uid")
+    if user_id and ObjectId.is_valid(user_id):
+        user_doc = await db["users"].find_one({"_id": ObjectId(user_id), "username": username})
+    else:
+        user_doc = await db["users"].find_one({"username": username})
+    if user_doc is None:
+        return None
+    user = user_doc_to_schema(user_doc)
+    user_cache.set(username, user)
+    return user
+
 async def get_current_user(token: str = Depends(oauth2_scheme), db=Depends(get_database)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -51,10 +79,13 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db=Depends(get_d
         token_data = TokenData(username=username)
     except JWTError:
         raise credentials_exception
-    user_doc = await db["users"].find_one({"username": token_data.username})
-    if user_doc is None:
+    # Tokens issued to a user who was already inactive can be rejected without a lookup
+    if payload.get("active") is False:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    user = await get_user_from_token_payload(db, payload)
+    if user is None:
         raise credentials_exception
-    return user_doc_to_schema(user_doc)
+    return user
 
 async def get_current_active_user(current_user: UserSchema = Depends(get_current_user)):
     if not current_user.is_active:
@@ -83,11 +114,7 @@ async def get_optional_user(token: Optional[str] = Depends(get_token_or_none), d
         username: str = payload.get("sub")
         if username is None:
             return None
-        token_data = TokenData(username=username)
-        user_doc = await db["users"].find_one({"username": token_data.username})
-        if user_doc is None:
-            return None
-        return user_doc_to_schema(user_doc)
+        return await get_user_from_token_payload(db, payload)
     except JWTError:
         return None
     except Exception:
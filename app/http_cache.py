@@ -0,0 +1,42 @@
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response, status
+
+from app.config import settings
+
+
+def make_etag(*parts) -> str:
+    """Build a strong ETag from the values that determine a response."""
+    digest = hashlib.sha256("\x1f".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def catalog_cache_control() -> str:
+    # The catalogue routes require a token, so only the client may cache them,
+    # not a shared cache that would serve them without checking Authorization
+    return f"private, max-age={settings.CATALOG_CACHE_MAX_AGE_SECONDS}"
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match header matches `etag` (weak comparison, as RFC 9110 specifies)."""
+    header: Optional[str] = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in header.split(","))
+    return any((tag[2:] if tag.startswith("W/") else tag) == etag for tag in candidates)
+
+
+def set_cache_headers(response: Response, etag: str):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = catalog_cache_control()
+
+
+def not_modified(etag: str) -> Response:
+    """A 304 response for a conditional GET whose representation hasn't changed."""
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": catalog_cache_control()},
+    )
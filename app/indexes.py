@@ -0,0 +1,165 @@
+"""
+Index manifest for the MongoDB collections.
+
+`INDEXES` lists the indexes every hot query relies on. They are created
+idempotently in the background when the API starts (see `ensure_indexes`).
+`QUERY_SHAPES` and `AGGREGATION_SHAPES` mirror the filtered queries and
+pipelines the routers issue so that `scripts/db/check_indexes.py` can explain
+them and fail on any collection scan.
+"""
+import logging
+from datetime import datetime
+from typing import Any, Dict, List
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+logger = logging.getLogger(__name__)
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "messages": [
+        # Conversation history, newest or oldest first, with _id breaking ties for cursor pagination
+        IndexModel([("conversation_id", ASCENDING), ("created_at", ASCENDING), ("_id", ASCENDING)], name="conversation_id_created_at_id"),
+    ],
+    "conversations": [
+        # A user's conversations, most recently updated first, with _id breaking ties for cursor pagination
+        IndexModel([("user_id", ASCENDING), ("updated_at", DESCENDING), ("_id", DESCENDING)], name="user_id_updated_at_id"),
+        # A user's conversation with a specific god
+        IndexModel([("user_id", ASCENDING), ("god_id", ASCENDING), ("updated_at", DESCENDING)], name="user_id_god_id_updated_at"),
+    ],
+    "users": [
+        IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    "gods": [
+        IndexModel([("name", ASCENDING)], name="name"),
+    ],
+    "questions": [
+        IndexModel([("god_id", ASCENDING)], name="god_id"),
+    ],
+}
+
+# Representative filtered queries issued by the routers: (description, collection, filter, sort)
+QUERY_SHAPES = [
+    ("chat history window", "messages", {"conversation_id": ObjectId()}, [("created_at", DESCENDING)]),
+    ("conversation messages", "messages", {"conversation_id": ObjectId()}, [("created_at", ASCENDING)]),
+    ("message page", "messages", {"conversation_id": ObjectId()}, [("created_at", DESCENDING), ("_id", DESCENDING)]),
+    ("message page before cursor", "messages", {"conversation_id": ObjectId(), "$or": [
+        {"created_at": {"$lt": datetime.utcnow()}},
+        {"created_at": datetime.utcnow(), "_id": {"$lt": ObjectId()}},
+    ]}, [("created_at", DESCENDING), ("_id", DESCENDING)]),
+    ("message page after cursor", "messages", {"conversation_id": ObjectId(), "$or": [
+        {"created_at": {"$gt": datetime.utcnow()}},
+        {"created_at": datetime.utcnow(), "_id": {"$gt": ObjectId()}},
+    ]}, [("created_at", ASCENDING), ("_id", ASCENDING)]),
+    # The summariser counts, then reads, the messages its summary doesn't cover yet
+    ("unsummarised message count", "messages", {"conversation_id": ObjectId(), "created_at": {"$gt": datetime.utcnow()}}, None),
+    ("unsummarised messages", "messages", {"conversation_id": ObjectId(), "created_at": {"$gt": datetime.utcnow()}}, [("created_at", ASCENDING)]),
+    ("list conversations", "conversations", {"user_id": ObjectId()}, [("updated_at", DESCENDING), ("_id", DESCENDING)]),
+    ("find conversation with god", "conversations", {"user_id": ObjectId(), "god_id": ObjectId()}, [("updated_at", DESCENDING)]),
+    ("get conversation", "conversations", {"_id": ObjectId(), "user_id": ObjectId()}, None),
+    ("user by username", "users", {"username": "devotee"}, None),
+    ("user by email", "users", {"email": "devotee@example.com"}, None),
+    ("user by id", "users", {"_id": ObjectId(), "username": "devotee"}, None),
+    ("god by name", "gods", {"name": "Hanuman"}, None),
+    ("god by id", "gods", {"_id": ObjectId()}, None),
+    ("questions for god", "questions", {"god_id": ObjectId()}, None),
+    # What the conversations-list $lookup runs against messages for each conversation
+    ("conversation has messages", "messages", {"$expr": {"$eq": ["$conversation_id", ObjectId()]}}, None),
+]
+
+# The conversations list keeps only conversations with at least one message
+CONVERSATION_HAS_MESSAGES_LOOKUP = {"$lookup": {
+    "from": "messages",
+    "let": {"conversation_id": "$_id"},
+    "pipeline": [
+        {"$match": {"$expr": {"$eq": ["$conversation_id", "$$conversation_id"]}}},
+        {"$limit": 1},
+        {"$project": {"_id": 1}},
+    ],
+    "as": "first_message",
+}}
+
+# Representative aggregations issued by the routers: (description, collection, pipeline)
+AGGREGATION_SHAPES = [
+    ("list conversations with messages", "conversations", [
+        {"$match": {"user_id": ObjectId()}},
+        {"$sort": {"updated_at": -1, "_id": -1}},
+        {"$limit": 20},
+        CONVERSATION_HAS_MESSAGES_LOOKUP,
+    ]),
+    ("list conversations after cursor", "conversations", [
+        {"$match": {"user_id": ObjectId(), "$or": [
+            {"updated_at": {"$lt": datetime.utcnow()}},
+            {"updated_at": datetime.utcnow(), "_id": {"$lt": ObjectId()}},
+        ]}},
+        {"$sort": {"updated_at": -1, "_id": -1}},
+        {"$limit": 20},
+        CONVERSATION_HAS_MESSAGES_LOOKUP,
+    ]),
+]
+
+async def ensure_indexes(db):
+    """Create every index in the manifest. Existing indexes are left untouched."""
+    for collection, indexes in INDEXES.items():
+        try:
+            names = await db[collection].create_indexes(indexes)
+            logger.info(f"Ensured indexes on {collection}: {', '.join(names)}")
+        except Exception as e:
+            logger.error(f"Failed to create indexes on {collection}: {str(e)}")
+
+
+def _winning_plans(explanation: Any) -> List[Any]:
+    # Aggregations nest their query plans under their stages (or shards)
+    plans = []
+    if isinstance(explanation, dict):
+        for key, value in explanation.items():
+            if key == "winningPlan":
+                plans.append(value)
+            else:
+                plans.extend(_winning_plans(value))
+    elif isinstance(explanation, list):
+        for item in explanation:
+            plans.extend(_winning_plans(item))
+    return plans
+
+
+def _plan_stages(plan: Any) -> List[str]:
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(_plan_stages(item))
+    return stages
+
+
+async def find_collection_scans(db) -> List[str]:
+    """
+    Explain every query and aggregation shape and describe those not served by an index.
+
+    A shape is reported if its plan scans a whole collection, or if it is an
+    EOF plan because the collection doesn't exist yet, since nothing about its
+    indexes can be checked then.
+    """
+    commands = []
+    for description, collection, query_filter, sort in QUERY_SHAPES:
+        command = {"find": collection, "filter": query_filter}
+        if sort:
+            command["sort"] = dict(sort)
+        commands.append((f"{description} ({collection} {query_filter})", command))
+    for description, collection, pipeline in AGGREGATION_SHAPES:
+        commands.append((f"{description} ({collection} aggregation)", {"aggregate": collection, "pipeline": pipeline, "cursor": {}}))
+
+    offenders = []
+    for description, command in commands:
+        explanation = await db.command("explain", command, verbosity="queryPlanner")
+        stages = [stage for plan in _winning_plans(explanation) for stage in _plan_stages(plan)]
+        if not stages or "EOF" in stages:
+            offenders.append(f"{description}: collection is missing, so no plan was chosen")
+        elif "COLLSCAN" in stages:
+            offenders.append(f"{description}: collection scan")
+    return offenders
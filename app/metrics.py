@@ -0,0 +1,186 @@
+"""
+Lightweight in-process metrics registry.
+
+Metrics are kept in memory per worker and can be rendered in the Prometheus
+text exposition format. Labels are passed as keyword arguments, e.g.
+
+    LLM_TIME_TO_FIRST_TOKEN.observe(0.42, model="gpt-3.5-turbo")
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(label_names: Tuple[str, ...], label_values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(label_names, label_values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def _header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [bucket counts..., sum, count]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, **labels) -> float:
+        series = self._values.get(self._key(labels))
+        return series[-1] if series else 0.0
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for key, series in sorted(self._values.items()):
+            cumulative = 0.0
+            for bound, bucket_count in zip(self.buckets, series):
+                cumulative += bucket_count
+                le = _format_labels(self.label_names, key, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            le = _format_labels(self.label_names, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {series[-1]}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {series[-2]}")
+            lines.append(f"{self.name}_count{labels} {series[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def counter(name: str, documentation: str, labels: Iterable[str] = ()) -> Counter:
+    return registry.register(Counter(name, documentation, labels))
+
+
+def gauge(name: str, documentation: str, labels: Iterable[str] = ()) -> Gauge:
+    return registry.register(Gauge(name, documentation, labels))
+
+
+def histogram(name: str, documentation: str, labels: Iterable[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+    return registry.register(Histogram(name, documentation, labels, buckets))
+
+
+class StageTimer:
+    """
+    Times the named stages of a single request.
+
+    Each stage is observed in `histogram` under a `stage` label and kept on the
+    timer so it can be reported back to the client as a Server-Timing header.
+    """
+
+    def __init__(self, stage_histogram: Histogram):
+        self.histogram = stage_histogram
+        self.timings: Dict[str, float] = {}
+
+    def record(self, name: str, seconds: float):
+        self.timings[name] = seconds
+        self.histogram.observe(seconds, stage=name)
+
+    @contextmanager
+    def stage(self, name: str):
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started_at)
+
+    async def measure(self, name: str, awaitable):
+        """Await `awaitable` and record how long it took, so concurrent steps can be timed individually."""
+        with self.stage(name):
+            return await awaitable
+
+    def server_timing_header(self) -> str:
+        return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.timings.items())
@@ -0,0 +1,81 @@
+import time
+
+from pymongo import monitoring
+
+from app.metrics import counter, gauge, histogram
+
+HTTP_REQUEST_DURATION = histogram(
+    "http_request_duration_seconds",
+    "Time to fully send an HTTP response, by route template",
+    labels=("method", "route", "status"),
+)
+HTTP_REQUESTS_IN_PROGRESS = gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being handled",
+)
+MONGODB_COMMAND_DURATION = histogram(
+    "mongodb_command_duration_seconds",
+    "Duration of MongoDB commands as reported by the driver",
+    labels=("command",),
+)
+MONGODB_COMMAND_FAILURES = counter(
+    "mongodb_command_failures_total",
+    "MongoDB commands that failed",
+    labels=("command",),
+)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route latency and in-flight requests.
+
+    Routes are labelled by their path template (e.g. /api/conversations/{conversation_id})
+    rather than the raw path, so the number of series stays bounded. Latency is
+    measured until the response body has been fully sent, which for streaming
+    responses includes the whole stream.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started_at = time.perf_counter()
+        HTTP_REQUESTS_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_PROGRESS.dec()
+            # The router stores the matched route on the scope while dispatching
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started_at,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=status_code,
+            )
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """pymongo command listener feeding MongoDB command timings into the metrics registry."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGODB_COMMAND_DURATION.observe(event.duration_micros / 1_000_000, command=event.command_name)
+
+    def failed(self, event):
+        MONGODB_COMMAND_DURATION.observe(event.duration_micros / 1_000_000, command=event.command_name)
+        MONGODB_COMMAND_FAILURES.inc(command=event.command_name)
@@ -0,0 +1,30 @@
+import base64
+import json
+from typing import Any, Dict
+
+from fastapi import HTTPException, Response, status
+
+# Header carrying the cursor for the next page of a listing; absent on the last page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(kind: str, position: Dict[str, Any]) -> str:
+    """Encode a listing position as an opaque, URL-safe cursor."""
+    payload = json.dumps({"k": kind, **position}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(kind: str, cursor: str) -> Dict[str, Any]:
+    """Decode a cursor produced by `encode_cursor` for the same listing, or raise a 400."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if position.pop("k") != kind:
+            raise ValueError(kind)
+        return position
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def set_next_cursor(response: Response, cursor: str):
+    response.headers[NEXT_CURSOR_HEADER] = cursor
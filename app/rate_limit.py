@@ -0,0 +1,171 @@
+"""
+Sliding-window rate limiting for API routes.
+
+Each limiter is a FastAPI dependency that counts requests per caller, keyed by
+user id when the request carries a valid token and by client IP otherwise,
+and answers 429 with Retry-After once the caller exceeds `limit` requests per
+`window_seconds`. Counts use the sliding-window counter approximation: the
+current fixed window's count plus the previous window's count weighted by how
+much of it still overlaps the sliding window.
+
+Counters live in process memory by default. Set RATE_LIMIT_BACKEND=redis to
+share them between workers through Redis (requires the `redis` package).
+"""
+import logging
+import math
+from abc import ABC, abstractmethod
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from fastapi import Depends, HTTPException, Request, status
+
+from app.config import settings
+from app.dependencies import get_optional_user
+from app.metrics import counter
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_REJECTED = counter(
+    "rate_limit_rejected_total",
+    "Requests rejected by a rate limiter",
+    labels=("limiter",),
+)
+
+
+def sliding_window_check(previous: int, current: int, limit: int, window_seconds: float, now: float) -> Tuple[bool, float]:
+    """
+    Decide whether one more request fits given the previous and current window counts.
+
+    Returns (allowed, retry_after_seconds).
+    """
+    elapsed = now % window_seconds
+    weight = 1 - elapsed / window_seconds
+    if previous * weight + current + 1 <= limit:
+        return True, 0.0
+    if current + 1 > limit or previous == 0:
+        # Nothing frees up before the current window ends
+        return False, window_seconds - elapsed
+    # Wait until enough of the previous window has slid out
+    needed_weight = (limit - current - 1) / previous
+    return False, max((1 - needed_weight) * window_seconds - elapsed, 0.0)
+
+
+class RateLimitBackend(ABC):
+    """Storage for rate limit counters."""
+
+    @abstractmethod
+    async def hit(self, key: str, limit: int, window_seconds: float) -> Tuple[bool, float]:
+        """Record a request for `key` if it is within the limit; return (allowed, retry_after_seconds)."""
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """
+    Per-process counters. At most `max_keys` callers are tracked; the least
+    recently seen are evicted first, which at worst forgets an idle caller's
+    count.
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._windows: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def hit(self, key, limit, window_seconds):
+        now = time.time()
+        window = int(now // window_seconds)
+        with self._lock:
+            entry = self._windows.get(key)
+            if entry is None or entry[0] < window - 1:
+                entry = [window, 0, 0]
+            elif entry[0] == window - 1:
+                entry = [window, 0, entry[1]]
+            self._windows[key] = entry
+            self._windows.move_to_end(key)
+            while len(self._windows) > self.max_keys:
+                self._windows.popitem(last=False)
+            allowed, retry_after = sliding_window_check(entry[2], entry[1], limit, window_seconds, now)
+            if allowed:
+                entry[1] += 1
+        return allowed, retry_after
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Counters shared between workers, stored in Redis with an expiry of two windows."""
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+
+        self.redis = redis.from_url(url)
+
+    async def hit(self, key, limit, window_seconds):
+        now = time.time()
+        window = int(now // window_seconds)
+        current_key = f"ratelimit:{key}:{window}"
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.incr(current_key)
+            pipe.expire(current_key, math.ceil(window_seconds * 2))
+            pipe.get(f"ratelimit:{key}:{window - 1}")
+            current, _, previous = await pipe.execute()
+        allowed, retry_after = sliding_window_check(int(previous or 0), current - 1, limit, window_seconds, now)
+        if not allowed:
+            # Only allowed requests count towards the limit
+            await self.redis.decr(current_key)
+        return allowed, retry_after
+
+
+_backend: Optional[RateLimitBackend] = None
+
+def get_rate_limit_backend() -> RateLimitBackend:
+    """Return the configured counter backend, creating it on first use."""
+    global _backend
+    if _backend is None:
+        if settings.RATE_LIMIT_BACKEND == "redis":
+            try:
+                _backend = RedisRateLimitBackend(settings.RATE_LIMIT_REDIS_URL)
+            except ImportError:
+                logger.warning("RATE_LIMIT_BACKEND is redis but the redis package is not installed, using in-memory rate limits")
+        if _backend is None:
+            _backend = InMemoryRateLimitBackend(settings.RATE_LIMIT_MAX_KEYS)
+    return _backend
+
+
+def client_ip(request: Request) -> str:
+    if settings.RATE_LIMIT_TRUST_FORWARDED_FOR:
+        forwarded_for = request.headers.get("x-forwarded-for")
+        if forwarded_for:
+            return forwarded_for.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+class RateLimit:
+    """Dependency limiting each caller to `limit` requests per `window_seconds` on the routes that use it."""
+
+    def __init__(self, name: str, limit: int, window_seconds: float):
+        self.name = name
+        self.limit = limit
+        self.window_seconds = window_seconds
+
+    async def __call__(self, request: Request, current_user=Depends(get_optional_user)):
+        if not settings.RATE_LIMIT_ENABLED or self.limit <= 0:
+            return
+        identity = f"user:{current_user.id}" if current_user else f"ip:{client_ip(request)}"
+        try:
+            allowed, retry_after = await get_rate_limit_backend().hit(f"{self.name}:{identity}", self.limit, self.window_seconds)
+        except Exception as e:
+            # A broken shared backend shouldn't take the API down with it
+            logger.warning(f"Rate limit backend error, allowing request: {str(e)}")
+            return
+        if not allowed:
+            RATE_LIMIT_REJECTED.inc(limiter=self.name)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, please slow down",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
+
+
+chat_rate_limit = RateLimit("chat", settings.RATE_LIMIT_CHAT_PER_MINUTE, 60)
+login_rate_limit = RateLimit("login", settings.RATE_LIMIT_LOGIN_PER_MINUTE, 60)
+register_rate_limit = RateLimit("register", settings.RATE_LIMIT_REGISTER_PER_HOUR, 3600)
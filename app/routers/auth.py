@@ -1,17 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from datetime import datetime, timedelta
-from passlib.context import CryptContext
 from bson import ObjectId
-import pytz
 
 from app.database import get_database
 from app.schemas import Token, UserCreate, User as UserSchema
 from app.config import settings
 from app.dependencies import create_access_token
-
-# Set timezone to IST
-IST = pytz.timezone('Asia/Kolkata')
+from app.services.password_service import password_hasher, PasswordHashQueueFullError
+from app.rate_limit import login_rate_limit, register_rate_limit
+from app.serialization import model_response, to_ist
 
 router = APIRouter(
     prefix="/auth",
@@ -19,20 +17,30 @@ router = APIRouter(
     responses={401: {"description": "Unauthorized"}},
 )
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing runs on a bounded worker pool so bcrypt never blocks the event loop
+password_busy_exception = HTTPException(
+    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    detail="Too many authentication requests, please try again shortly",
+    headers={"Retry-After": "1"},
+)
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password, hashed_password):
+    try:
+        return await password_hasher.verify(plain_password, hashed_password)
+    except PasswordHashQueueFullError:
+        raise password_busy_exception
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+async def get_password_hash(password):
+    try:
+        return await password_hasher.hash(password)
+    except PasswordHashQueueFullError:
+        raise password_busy_exception
 
 async def authenticate_user(db, username: str, password: str):
     user = await db["users"].find_one({"username": username})
     if not user:
         return None
-    if not verify_password(password, user["hashed_password"]):
+    if not await verify_password(password, user["hashed_password"]):
         return None
     return user
 
@@ -40,22 +48,15 @@ async def authenticate_user(db, username: str, password: str):
 def user_doc_to_schema(doc):
     if not doc:
         return None
-    
-    # Convert UTC to IST for API response
-    created_at = doc.get("created_at", datetime.utcnow())
-    if created_at.tzinfo is None:
-        created_at = pytz.utc.localize(created_at)
-    created_at_ist = created_at.astimezone(IST)
-    
-    return UserSchema(
+    return UserSchema.model_construct(
         id=str(doc["_id"]),
         username=doc["username"],
         email=doc["email"],
         is_active=doc.get("is_active", True),
-        created_at=created_at_ist,
+        created_at=to_ist(doc.get("created_at", datetime.utcnow())),
     )
 
-@router.post("/register", response_model=UserSchema)
+@router.post("/register", response_model=UserSchema, dependencies=[Depends(register_rate_limit)])
 async def register_user(user: UserCreate, db=Depends(get_database)):
     # Check if username already exists
     if await db["users"].find_one({"username": user.username}):
@@ -69,7 +70,7 @@ async def register_user(user: UserCreate, db=Depends(get_database)):
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash(user.password)
     user_doc = {
         "username": user.username,
         "email": user.email,
@@ -79,9 +80,9 @@ async def register_user(user: UserCreate, db=Depends(get_database)):
     }
     result = await db["users"].insert_one(user_doc)
     new_user = await db["users"].find_one({"_id": result.inserted_id})
-    return user_doc_to_schema(new_user)
+    return model_response(user_doc_to_schema(new_user))
 
-@router.post("/token", response_model=Token)
+@router.post("/token", response_model=Token, dependencies=[Depends(login_rate_limit)])
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db=Depends(get_database)
@@ -95,6 +96,11 @@ async def login_for_access_token(
         )
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user["username"]}, expires_delta=access_token_expires
+        data={
+            "sub": user["username"],
+            "uid": str(user["_id"]),
+            "active": user.get("is_active", True),
+        },
+        expires_delta=access_token_expires
     )
-    return {"access_token": access_token, "token_type": "bearer"}
+    return model_response(Token.model_construct(access_token=access_token, token_type="bearer"))
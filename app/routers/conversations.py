@@ -1,16 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
+from typing import List, NamedTuple, Optional
 from bson import ObjectId
 from datetime import datetime
-import pytz
+import asyncio
+import logging
 
+from app.config import settings
 from app.database import get_database
-from app.schemas import Conversation as ConversationSchema, ConversationCreate, Message as MessageSchema, ChatRequest, ChatResponse
+from app.schemas import Conversation as ConversationSchema, ConversationCreate, Message as MessageSchema, MessagePage, ChatRequest, ChatResponse
 from app.dependencies import get_current_active_user
-from app.services.openai_service import OpenAIService
+from app.rate_limit import chat_rate_limit
+from app.pagination import decode_cursor, encode_cursor, set_next_cursor
+from app.serialization import dumps_json, model_response, to_ist
+from app.metrics import StageTimer, histogram
+from app.services.openai_service import FALLBACK_RESPONSE, MAX_TOKENS, LLMReply, LLMStreamInterruptedError, LLMUnavailableError, OpenAIService
+from app.services.answer_cache import answer_cache
+from app.services.semantic_cache import get_semantic_cache
+from app.services.god_catalog import god_catalog
+from app.services.context_builder import build_context, store_token_counts
+from app.services.llm_limiter import LLMAdmission, LLMAdmissionRejectedError, llm_limiter, retry_after_header
+from app.services.summarizer import history_messages_per_turn, system_prompt_with_summary, update_conversation_summary
+from app.services.tokenizer import count_tokens
+from app.services.write_behind import reply_writer
 
-# Set timezone to IST
-IST = pytz.timezone('Asia/Kolkata')
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/conversations",
@@ -22,26 +36,13 @@ router = APIRouter(
 def conversation_doc_to_schema(doc, messages=None, god=None):
     if not doc:
         return None
-    
-    # Convert UTC to IST for API response
-    created_at = doc.get("created_at", datetime.utcnow())
-    if created_at.tzinfo is None:
-        created_at = pytz.utc.localize(created_at)
-    created_at_ist = created_at.astimezone(IST)
-    
-    updated_at = doc.get("updated_at")
-    if updated_at:
-        if updated_at.tzinfo is None:
-            updated_at = pytz.utc.localize(updated_at)
-        updated_at = updated_at.astimezone(IST)
-    
-    return ConversationSchema(
+    return ConversationSchema.model_construct(
         id=str(doc["_id"]),
         title=doc["title"],
         user_id=str(doc["user_id"]),
         god_id=str(doc["god_id"]),
-        created_at=created_at_ist,
-        updated_at=updated_at,
+        created_at=to_ist(doc.get("created_at", datetime.utcnow())),
+        updated_at=to_ist(doc.get("updated_at")),
         messages=messages or [],
         god=god,
     )
@@ -49,19 +50,13 @@ def conversation_doc_to_schema(doc, messages=None, god=None):
 def message_doc_to_schema(doc):
     if not doc:
         return None
-    
-    # Convert UTC to IST for API response
-    created_at = doc.get("created_at", datetime.utcnow())
-    if created_at.tzinfo is None:
-        created_at = pytz.utc.localize(created_at)
-    created_at_ist = created_at.astimezone(IST)
-    
-    return MessageSchema(
+    return MessageSchema.model_construct(
         id=str(doc["_id"]),
         conversation_id=str(doc["conversation_id"]),
         content=doc["content"],
         is_from_user=doc.get("is_from_user", True),
-        created_at=created_at_ist,
+        created_at=to_ist(doc.get("created_at", datetime.utcnow())),
+        is_fallback=doc.get("is_fallback", False),
     )
 
 @router.get("/find/{god_id}", response_model=ConversationSchema)
@@ -86,11 +81,11 @@ async def find_conversation_with_god(
         raise HTTPException(status_code=404, detail="No conversation found with this god")
 
     # Get the god details
-    god = await db["gods"].find_one({"_id": god_oid})
+    god = await god_catalog.get_schema(db, god_oid)
     if not god:
         raise HTTPException(status_code=404, detail="God not found")
 
-    return conversation_doc_to_schema(conversation, god=god)
+    return model_response(conversation_doc_to_schema(conversation, god=god))
 
 @router.post("/", response_model=ConversationSchema)
 async def create_conversation(
@@ -110,8 +105,8 @@ async def create_conversation(
             )
 
         # Check if god exists
-        god = await db["gods"].find_one({"_id": god_oid})
-        if not god:
+        god_schema = await god_catalog.get_schema(db, god_oid)
+        if not god_schema:
             raise HTTPException(
                 status_code=404,
                 detail=f"God with ID {conversation.god_id} not found"
@@ -125,9 +120,7 @@ async def create_conversation(
 
         if existing_conv:
             # Return existing conversation with god details
-            from app.routers.gods import god_doc_to_schema
-            god_schema = god_doc_to_schema(god)
-            return conversation_doc_to_schema(existing_conv, god=god_schema)
+            return model_response(conversation_doc_to_schema(existing_conv, god=god_schema))
 
         # Create new conversation
         conv_doc = {
@@ -152,10 +145,7 @@ async def create_conversation(
                 detail="Failed to retrieve created conversation"
             )
 
-        # Convert god to schema
-        from app.routers.gods import god_doc_to_schema
-        god_schema = god_doc_to_schema(god)
-        return conversation_doc_to_schema(new_conv, god=god_schema)
+        return model_response(conversation_doc_to_schema(new_conv, god=god_schema))
 
     except HTTPException:
         raise
@@ -167,37 +157,125 @@ async def create_conversation(
 
 @router.get("/", response_model=List[ConversationSchema])
 async def get_conversations(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db=Depends(get_database),
     current_user=Depends(get_current_active_user)
 ):
-    # Get all conversations for the user
-    cursor = db["conversations"].find({"user_id": ObjectId(current_user.id)}).sort("updated_at", -1).skip(skip).limit(limit)
-    conversations = [doc async for doc in cursor]
-    
-    # Filter conversations that have at least one message and get god details
-    result = []
-    for conv in conversations:
-        # Check if conversation has any messages
-        msg_count = await db["messages"].count_documents({"conversation_id": conv["_id"]})
-        if msg_count > 0:
-            god = await db["gods"].find_one({"_id": conv["god_id"]})
-            if god:
-                from app.routers.gods import god_doc_to_schema
-                god_schema = god_doc_to_schema(god)
-                result.append(conversation_doc_to_schema(conv, god=god_schema))
-            else:
-                result.append(conversation_doc_to_schema(conv))
-    
-    return result
+    """
+    List the user's conversations, most recently updated first.
+
+    Pages can be requested with `skip`, or with the opaque `cursor` returned in
+    the X-Next-Cursor header of the previous page, which stays fast however
+    deep the page is. When a cursor is given, `skip` is ignored.
+    """
+    match = {"user_id": ObjectId(current_user.id)}
+    if cursor:
+        position = decode_cursor("conversations", cursor)
+        try:
+            updated_at, last_id = datetime.fromisoformat(position["updated_at"]), ObjectId(position["id"])
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        # Resume strictly after the last conversation of the previous page
+        match["$or"] = [
+            {"updated_at": {"$lt": updated_at}},
+            {"updated_at": updated_at, "_id": {"$lt": last_id}},
+        ]
+    # Get the page of conversations for the user, keeping only those that have at
+    # least one message. The existence check is a $lookup limited to a single
+    # message so it stays one round trip regardless of conversation length.
+    pipeline = [
+        {"$match": match},
+        {"$sort": {"updated_at": -1, "_id": -1}},
+    ]
+    if not cursor:
+        pipeline.append({"$skip": skip})
+    if limit > 0:
+        pipeline.append({"$limit": limit})
+    pipeline.append({"$lookup": {
+        "from": "messages",
+        "let": {"conversation_id": "$_id"},
+        "pipeline": [
+            {"$match": {"$expr": {"$eq": ["$conversation_id", "$$conversation_id"]}}},
+            {"$limit": 1},
+            {"$project": {"_id": 1}},
+        ],
+        "as": "first_message",
+    }})
+    page = await db["conversations"].aggregate(pipeline).to_list(length=None)
+
+    # The cursor points past the whole page, including conversations filtered
+    # out below for having no messages
+    if limit > 0 and len(page) == limit:
+        last = page[-1]
+        set_next_cursor(response, encode_cursor("conversations", {
+            "updated_at": last["updated_at"].isoformat(),
+            "id": str(last["_id"]),
+        }))
+
+    # Resolve gods from the in-memory catalogue
+    return model_response([
+        conversation_doc_to_schema(conv, god=await god_catalog.get_schema(db, conv["god_id"]))
+        for conv in page
+        if conv["first_message"]
+    ], response)
+
+def message_cursor(doc) -> str:
+    return encode_cursor("messages", {"created_at": doc["created_at"].isoformat(), "id": str(doc["_id"])})
+
+def decode_message_cursor(cursor: str):
+    position = decode_cursor("messages", cursor)
+    try:
+        return datetime.fromisoformat(position["created_at"]), ObjectId(position["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def load_message_page(db, conv_oid: ObjectId, limit: int, before: Optional[str] = None, after: Optional[str] = None) -> MessagePage:
+    """
+    Load one page of a conversation's messages, ordered by (created_at, _id).
+
+    Without cursors this is the newest page. `before` pages back through older
+    messages and `after` fetches messages newer than a previous page, e.g. to
+    pick up new replies.
+    """
+    query = {"conversation_id": conv_oid}
+    if after:
+        created_at, last_id = decode_message_cursor(after)
+        query["$or"] = [{"created_at": {"$gt": created_at}}, {"created_at": created_at, "_id": {"$gt": last_id}}]
+        docs = await db["messages"].find(query).sort([("created_at", 1), ("_id", 1)]).limit(limit).to_list(length=limit)
+        has_older = True
+    else:
+        if before:
+            created_at, first_id = decode_message_cursor(before)
+            query["$or"] = [{"created_at": {"$lt": created_at}}, {"created_at": created_at, "_id": {"$lt": first_id}}]
+        # Read one extra message to find out whether there is an older page
+        docs = await db["messages"].find(query).sort([("created_at", -1), ("_id", -1)]).limit(limit + 1).to_list(length=limit + 1)
+        has_older = len(docs) > limit
+        docs = docs[:limit]
+        docs.reverse()
+    return MessagePage.model_construct(
+        messages=[message_doc_to_schema(doc) for doc in docs],
+        next_before=message_cursor(docs[0]) if docs and has_older else None,
+        next_after=message_cursor(docs[-1]) if docs else after,
+    )
 
 @router.get("/{conversation_id}", response_model=ConversationSchema)
 async def get_conversation(
     conversation_id: str,
+    response: Response,
+    message_limit: Optional[int] = None,
     db=Depends(get_database),
     current_user=Depends(get_current_active_user)
 ):
+    """
+    Get a conversation with its messages.
+
+    With `message_limit` (or CONVERSATION_DETAIL_MESSAGE_LIMIT) only the latest
+    messages are returned, and the X-Next-Cursor header holds the `before`
+    cursor for loading older ones from GET /conversations/{id}/messages.
+    """
     try:
         oid = ObjectId(conversation_id)
     except Exception:
@@ -205,16 +283,48 @@ async def get_conversation(
     conv_doc = await db["conversations"].find_one({"_id": oid, "user_id": ObjectId(current_user.id)})
     if not conv_doc:
         raise HTTPException(status_code=404, detail="Conversation not found")
+    if message_limit is None:
+        message_limit = settings.CONVERSATION_DETAIL_MESSAGE_LIMIT
     # Get messages
-    msg_cursor = db["messages"].find({"conversation_id": oid}).sort("created_at", 1)
-    messages = [message_doc_to_schema(doc) async for doc in msg_cursor]
+    if message_limit > 0:
+        page = await load_message_page(db, oid, min(message_limit, settings.MESSAGE_PAGE_MAX_SIZE))
+        messages = page.messages
+        if page.next_before:
+            set_next_cursor(response, page.next_before)
+    else:
+        msg_cursor = db["messages"].find({"conversation_id": oid}).sort("created_at", 1)
+        messages = [message_doc_to_schema(doc) async for doc in msg_cursor]
     # Get god
-    god_doc = await db["gods"].find_one({"_id": conv_doc["god_id"]})
-    god = None
-    if god_doc:
-        from app.routers.gods import god_doc_to_schema
-        god = god_doc_to_schema(god_doc)
-    return conversation_doc_to_schema(conv_doc, messages=messages, god=god)
+    god = await god_catalog.get_schema(db, conv_doc["god_id"])
+    return model_response(conversation_doc_to_schema(conv_doc, messages=messages, god=god), response)
+
+@router.get("/{conversation_id}/messages", response_model=MessagePage)
+async def get_conversation_messages(
+    conversation_id: str,
+    limit: Optional[int] = None,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    db=Depends(get_database),
+    current_user=Depends(get_current_active_user)
+):
+    """
+    Page through a conversation's messages, newest page first.
+
+    Messages within a page are oldest first. Pass `next_before` as `before` to
+    load older messages, or `next_after` as `after` to load newer ones.
+    """
+    if before and after:
+        raise HTTPException(status_code=400, detail="Pass either before or after, not both")
+    try:
+        oid = ObjectId(conversation_id)
+    except Exception:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    if not await db["conversations"].find_one({"_id": oid, "user_id": ObjectId(current_user.id)}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    if limit is None:
+        limit = settings.MESSAGE_PAGE_DEFAULT_SIZE
+    limit = max(1, min(limit, settings.MESSAGE_PAGE_MAX_SIZE))
+    return model_response(await load_message_page(db, oid, limit, before=before, after=after))
 
 @router.delete("/{conversation_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_conversation(
@@ -232,51 +342,281 @@ async def delete_conversation(
         raise HTTPException(status_code=404, detail="Conversation not found")
     return None
 
-@router.post("/chat", response_model=ChatResponse)
-async def chat_with_god(
-    chat_request: ChatRequest,
-    db=Depends(get_database),
-    current_user=Depends(get_current_active_user)
-):
+CHAT_STAGE_SECONDS = histogram(
+    "chat_stage_seconds",
+    "Time spent in each stage of a chat turn",
+    labels=("stage",),
+)
+
+async def load_history_window(db, conv_oid: ObjectId, limit: int):
+    """Return the latest `limit` messages of a conversation in chronological order, fallback replies included."""
+    if limit <= 0:
+        return []
+    msg_cursor = db["messages"].find(
+        {"conversation_id": conv_oid},
+        {"content": 1, "is_from_user": 1, "is_fallback": 1, "token_count": 1, "created_at": 1},
+    ).sort("created_at", -1).limit(limit)
+    messages = await msg_cursor.to_list(length=limit)
+    messages.reverse()
+    return messages
+
+class ChatTurn(NamedTuple):
+    conv_oid: ObjectId
+    god_id: ObjectId
+    system_prompt: str
+    messages: List[dict]
+    user_message_saved: asyncio.Future
+    is_first_turn: bool
+    answer_key: Optional[tuple]
+    cached_reply: Optional[str]
+    pending_reply: Optional[asyncio.Future]
+    admission: Optional[LLMAdmission]
+
+async def prepare_chat_turn(db, chat_request: ChatRequest, current_user, timer: StageTimer, background_tasks: BackgroundTasks, streaming: bool = False):
+    """
+    Load the conversation, god and history for a chat turn, admit it to the LLM
+    (or answer it from the caches) and start saving the user's message.
+    Callers must await `user_message_saved` before writing the reply.
+    """
     try:
         conv_oid = ObjectId(chat_request.conversation_id)
     except Exception:
         raise HTTPException(status_code=404, detail="Conversation not found")
-    conversation = await db["conversations"].find_one({"_id": conv_oid, "user_id": ObjectId(current_user.id)})
+    # The history is read alongside the conversation but only used once the
+    # conversation is known to belong to the user
+    with timer.stage("load"):
+        conversation, history = await asyncio.gather(
+            db["conversations"].find_one({"_id": conv_oid, "user_id": ObjectId(current_user.id)}),
+            load_history_window(db, conv_oid, history_messages_per_turn()),
+        )
     if not conversation:
         raise HTTPException(status_code=404, detail="Conversation not found")
-    god = await db["gods"].find_one({"_id": conversation["god_id"]})
+    god = await god_catalog.get(db, conversation["god_id"])
     if not god:
         raise HTTPException(status_code=404, detail="God not found")
-    # Save the user message
+    # Older turns are covered by the rolling summary in the system prompt, so
+    # messages it already includes are left out of the history
+    system_prompt = system_prompt_with_summary(god.get("system_prompt", ""), conversation.get("summary"))
+    summary_until = conversation.get("summary_until")
+    if summary_until:
+        history = [message for message in history if message["created_at"] > summary_until]
+    # The summariser counts fallback replies too, and only has work once this
+    # turn's two messages push the unsummarised ones past the window. A full
+    # window may hide older unsummarised messages, which this also catches.
+    needs_summary = settings.CHAT_SUMMARY_ENABLED and len(history) + 2 > history_messages_per_turn()
+    # Fallback replies stay out of the prompt
+    history = [message for message in history if not message.get("is_fallback")]
     user_message_doc = {
         "conversation_id": conv_oid,
         "content": chat_request.message,
         "is_from_user": True,
+        "token_count": count_tokens(chat_request.message),
         "created_at": datetime.utcnow(),
     }
-    await db["messages"].insert_one(user_message_doc)
-    # Get conversation history
-    msg_cursor = db["messages"].find({"conversation_id": conv_oid}).sort("created_at", 1)
-    messages = [message_doc_to_schema(doc) async for doc in msg_cursor]
-    # Format messages for OpenAI
-    formatted_messages = OpenAIService.format_conversation_history(messages)
-    # Generate response from OpenAI
-    response_text = await OpenAIService.generate_response(
-        messages=formatted_messages,
-        system_prompt=god.get("system_prompt", "")
+    # Fill CHAT_CONTEXT_TOKEN_BUDGET with the most recent messages; token counts
+    # computed here for older messages are stored after the response
+    uncounted = [message for message in history if message.get("token_count") is None]
+    formatted_messages, prompt_tokens = build_context(
+        system_prompt,
+        history + [user_message_doc],
+        settings.CHAT_CONTEXT_TOKEN_BUDGET,
     )
-    # Save the god's response
+    is_first_turn = not history and not conversation.get("summary")
+    answer_key = None
+    if settings.ANSWER_CACHE_ENABLED and is_first_turn:
+        answer_key = await answer_cache.key_for(db, god["_id"], chat_request.message, system_prompt)
+    # Opening messages may be answered from the caches without calling the LLM
+    cached_reply = await find_cached_reply(god["_id"], chat_request.message, system_prompt, is_first_turn, answer_key)
+    # Admit the turn before anything is written, or answer 503 with Retry-After.
+    # Streaming callers must release `admission` once the LLM call is done.
+    admission = pending_reply = None
+    if cached_reply is None:
+        try:
+            with timer.stage("admission"):
+                if streaming:
+                    admission = await llm_limiter.acquire(prompt_tokens + MAX_TOKENS)
+                else:
+                    # Identical concurrent turns share one completion and one admission
+                    pending_reply = await OpenAIService.admit_response(formatted_messages, system_prompt, prompt_tokens + MAX_TOKENS)
+        except LLMAdmissionRejectedError as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="The gods are busy right now, please try again shortly",
+                headers={"Retry-After": retry_after_header(e)},
+            )
+    # Save the user message while the reply is being generated; the summary is
+    # brought up to date after the response
+    user_message_saved = asyncio.ensure_future(
+        timer.measure("save_user_message", db["messages"].insert_one(user_message_doc))
+    )
+    if uncounted:
+        background_tasks.add_task(store_token_counts, db, uncounted)
+    if needs_summary:
+        background_tasks.add_task(update_conversation_summary, db, conv_oid)
+    return ChatTurn(
+        conv_oid, god["_id"], system_prompt, formatted_messages, user_message_saved,
+        is_first_turn, answer_key, cached_reply, pending_reply, admission,
+    )
+
+async def find_cached_reply(god_id: ObjectId, message: str, system_prompt: str, is_first_turn: bool, answer_key: Optional[tuple]) -> Optional[str]:
+    """Look up a reply to the opening message of a conversation, exact match first."""
+    if answer_key:
+        reply = answer_cache.get(answer_key)
+        if reply is not None:
+            return reply
+    semantic_cache = get_semantic_cache()
+    if is_first_turn and semantic_cache is not None:
+        return await semantic_cache.lookup(god_id, message, system_prompt)
+    return None
+
+def remember_reply(turn: ChatTurn, message: str, reply: LLMReply, background_tasks: BackgroundTasks):
+    """Store a freshly generated reply to an opening message in the answer caches."""
+    if reply.is_fallback:
+        return
+    if turn.answer_key:
+        answer_cache.set(turn.answer_key, reply.text)
+    # Only curated questions go into the semantic cache, so personal replies are
+    # never shared. Embedding the question is slow, so it happens after the response.
+    semantic_cache = get_semantic_cache()
+    if turn.answer_key and semantic_cache is not None:
+        background_tasks.add_task(semantic_cache.add, turn.god_id, message, turn.system_prompt, reply.text)
+
+async def save_god_reply(db, conv_oid: ObjectId, response_text: str, is_fallback: bool = False):
+    """
+    Persist the god's reply and bump the conversation's updated_at timestamp.
+
+    With REPLY_WRITE_BEHIND_ENABLED the writes are handed to the write-behind
+    queue and happen after the response is sent; if the queue refuses the
+    reply it is written here as usual.
+    """
+    now = datetime.utcnow()
     god_message_doc = {
         "conversation_id": conv_oid,
         "content": response_text,
         "is_from_user": False,
-        "created_at": datetime.utcnow(),
+        "token_count": count_tokens(response_text),
+        "created_at": now,
     }
-    await db["messages"].insert_one(god_message_doc)
-    # Update conversation's updated_at timestamp
-    await db["conversations"].update_one({"_id": conv_oid}, {"$set": {"updated_at": datetime.utcnow()}})
-    return ChatResponse(
-        message=response_text,
-        conversation_id=str(conv_oid)
+    if is_fallback:
+        god_message_doc["is_fallback"] = True
+    if settings.REPLY_WRITE_BEHIND_ENABLED and reply_writer.enqueue(db, god_message_doc):
+        return
+    # The two writes touch different collections, so issue them concurrently
+    await asyncio.gather(
+        db["messages"].insert_one(god_message_doc),
+        db["conversations"].update_one({"_id": conv_oid}, {"$set": {"updated_at": now}}),
+    )
+
+def sse_event(event: str, data: dict) -> str:
+    """Encode a single Server-Sent Event."""
+    return f"event: {event}\ndata: {dumps_json(data).decode()}\n\n"
+
+@router.post("/chat", response_model=ChatResponse, dependencies=[Depends(chat_rate_limit)])
+async def chat_with_god(
+    chat_request: ChatRequest,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    db=Depends(get_database),
+    current_user=Depends(get_current_active_user)
+):
+    timer = StageTimer(CHAT_STAGE_SECONDS)
+    turn = await prepare_chat_turn(db, chat_request, current_user, timer, background_tasks)
+    try:
+        if turn.cached_reply is not None:
+            reply = LLMReply(turn.cached_reply)
+        else:
+            # Wait for the reply from OpenAI
+            with timer.stage("llm"):
+                reply = await turn.pending_reply
+            remember_reply(turn, chat_request.message, reply, background_tasks)
+    finally:
+        await turn.user_message_saved
+    # Save the god's response
+    with timer.stage("save_reply"):
+        await save_god_reply(db, turn.conv_oid, reply.text, reply.is_fallback)
+    response.headers["Server-Timing"] = timer.server_timing_header()
+    return model_response(ChatResponse.model_construct(
+        message=reply.text,
+        conversation_id=str(turn.conv_oid),
+        is_fallback=reply.is_fallback,
+    ), response)
+
+async def save_streamed_reply(db, turn: ChatTurn, timer: StageTimer, response_text: str, is_fallback: bool):
+    """Save whatever text a stream produced, once the user's message has been saved."""
+    try:
+        await turn.user_message_saved
+        if response_text:
+            with timer.stage("save_reply"):
+                await save_god_reply(db, turn.conv_oid, response_text, is_fallback)
+    except Exception:
+        # Nobody may be waiting on this task any more
+        logger.exception("Failed to save streamed reply")
+        raise
+
+@router.post("/chat/stream", dependencies=[Depends(chat_rate_limit)])
+async def chat_with_god_stream(
+    chat_request: ChatRequest,
+    background_tasks: BackgroundTasks,
+    db=Depends(get_database),
+    current_user=Depends(get_current_active_user)
+):
+    """
+    Streaming variant of /chat using Server-Sent Events.
+
+    Emits a `message` event with a `delta` for every chunk of text received from
+    the LLM, then a final `done` event carrying the same payload as /chat once
+    the complete reply has been saved. If the LLM fails partway through, an
+    `error` event is sent instead of `done`. A last `timing` event carries the
+    stage timings that /chat returns in its Server-Timing header.
+    """
+    timer = StageTimer(CHAT_STAGE_SECONDS)
+    turn = await prepare_chat_turn(db, chat_request, current_user, timer, background_tasks, streaming=True)
+    if turn.admission:
+        # The stream may never start if the client goes away, so also release after the response
+        background_tasks.add_task(turn.admission.release)
+
+    async def event_stream():
+        chunks = []
+        completed = False
+        unavailable = False
+        try:
+            # Streamed replies aren't cached since a stream that fails midway still ends normally
+            if turn.cached_reply is not None:
+                chunks.append(turn.cached_reply)
+                yield sse_event("message", {"delta": turn.cached_reply})
+                completed = True
+            else:
+                with timer.stage("llm"):
+                    try:
+                        async for delta in OpenAIService.generate_response_stream(
+                            messages=turn.messages,
+                            system_prompt=turn.system_prompt
+                        ):
+                            chunks.append(delta)
+                            yield sse_event("message", {"delta": delta})
+                        completed = True
+                    except LLMUnavailableError:
+                        unavailable = completed = True
+                        chunks.append(FALLBACK_RESPONSE)
+                        yield sse_event("message", {"delta": FALLBACK_RESPONSE})
+                    except LLMStreamInterruptedError:
+                        yield sse_event("error", {"detail": "The reply was interrupted, please try again"})
+        finally:
+            if turn.admission:
+                turn.admission.release()
+            response_text = "".join(chunks).strip()
+            # A reply that was cut short is kept but flagged, so it stays out of later prompts
+            is_fallback = unavailable or not completed
+            # If the client disconnects this generator is cancelled, so the save runs in its own task
+            reply_saved = asyncio.ensure_future(save_streamed_reply(db, turn, timer, response_text, is_fallback))
+        await asyncio.shield(reply_saved)
+        if completed:
+            yield sse_event("done", ChatResponse.model_construct(message=response_text, conversation_id=str(turn.conv_oid), is_fallback=is_fallback))
+        # Headers are sent before the stream starts, so the timings come last in the body
+        yield sse_event("timing", {"server_timing": timer.server_timing_header()})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
@@ -2,8 +2,8 @@ from fastapi import APIRouter, Depends, HTTPException
 from app.dependencies import get_optional_user
 from app.database import get_database
 from app.schemas import FeedbackCreate, Feedback as FeedbackSchema
+from app.serialization import model_response
 from datetime import datetime
-import pytz
 import logging
 from typing import Optional
 
@@ -41,7 +41,7 @@ async def create_feedback(
         new_feedback = await db["feedback"].find_one({"_id": result.inserted_id})
         
         logger.info(f"Successfully created feedback with ID: {result.inserted_id}")
-        return FeedbackSchema(
+        return model_response(FeedbackSchema.model_construct(
             id=str(new_feedback["_id"]),
             user_id=str(new_feedback["user_id"]) if new_feedback.get("user_id") else None,
             rating=new_feedback["rating"],
@@ -49,7 +49,7 @@ async def create_feedback(
             dislikes=new_feedback["dislikes"],
             created_at=new_feedback["created_at"],
             updated_at=new_feedback["updated_at"]
-        )
+        ))
     except Exception as e:
         logger.error(f"Error creating feedback: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
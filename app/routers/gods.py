@@ -1,15 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from typing import List, Optional
 from bson import ObjectId
 from datetime import datetime
-import pytz
 
 from app.database import get_database
 from app.schemas import God as GodSchema, GodCreate
 from app.dependencies import get_current_active_user
-
-# Set timezone to IST
-IST = pytz.timezone('Asia/Kolkata')
+from app.services.god_catalog import god_catalog
+from app.http_cache import etag_matches, make_etag, not_modified, set_cache_headers
+from app.pagination import decode_cursor, encode_cursor, set_next_cursor
+from app.serialization import model_response, to_ist
 
 router = APIRouter(
     prefix="/gods",
@@ -21,14 +21,7 @@ router = APIRouter(
 def god_doc_to_schema(doc):
     if not doc:
         return None
-    
-    # Convert UTC to IST for API response
-    created_at = doc.get("created_at", datetime.utcnow())
-    if created_at.tzinfo is None:
-        created_at = pytz.utc.localize(created_at)
-    created_at_ist = created_at.astimezone(IST)
-    
-    return GodSchema(
+    return GodSchema.model_construct(
         id=str(doc["_id"]),
         name=doc["name"],
         description=doc["description"],
@@ -38,7 +31,7 @@ def god_doc_to_schema(doc):
         personality_traits=doc.get("personality_traits", []),
         image_url=doc.get("image_url"),
         religion=doc["religion"],
-        created_at=created_at_ist,
+        created_at=to_ist(doc.get("created_at", datetime.utcnow())),
     )
 
 @router.post("/", response_model=GodSchema)
@@ -58,19 +51,47 @@ async def create_god(
     # Store UTC time in database
     god_doc["created_at"] = datetime.utcnow()
     result = await db["gods"].insert_one(god_doc)
+    god_catalog.invalidate()
     new_god = await db["gods"].find_one({"_id": result.inserted_id})
-    return god_doc_to_schema(new_god)
+    return model_response(god_doc_to_schema(new_god))
 
 @router.get("/", response_model=List[GodSchema])
 async def get_gods(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db=Depends(get_database),
     current_user=Depends(get_current_active_user)
 ):
-    cursor = db["gods"].find().skip(skip).limit(limit)
-    gods = [god_doc_to_schema(doc) async for doc in cursor]
-    return gods
+    """
+    List gods ordered by id.
+
+    Pages can be requested with `skip`, or with the opaque `cursor` returned in
+    the X-Next-Cursor header of the previous page. When a cursor is given,
+    `skip` is ignored.
+    """
+    # Served from the in-memory catalogue; the ETag changes whenever its contents do
+    gods = await god_catalog.all(db)
+    etag = make_etag("gods", await god_catalog.get_version(db), skip, limit, cursor)
+    if cursor:
+        try:
+            after = ObjectId(decode_cursor("gods", cursor)["id"])
+        except HTTPException:
+            raise
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        start = await god_catalog.position_after(db, after)
+    else:
+        start = skip
+    page = gods[start:start + limit] if limit > 0 else gods[start:]
+    if limit > 0 and start + limit < len(gods):
+        set_next_cursor(response, encode_cursor("gods", {"id": page[-1].id}))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_cache_headers(response, etag)
+    return model_response(page, response)
 
 @router.get("/{god_id}", response_model=GodSchema)
 async def get_god(
@@ -85,7 +106,7 @@ async def get_god(
     doc = await db["gods"].find_one({"_id": oid})
     if not doc:
         raise HTTPException(status_code=404, detail="God not found")
-    return god_doc_to_schema(doc)
+    return model_response(god_doc_to_schema(doc))
 
 @router.put("/{god_id}", response_model=GodSchema)
 async def update_god(
@@ -102,8 +123,9 @@ async def update_god(
     result = await db["gods"].update_one({"_id": oid}, update_doc)
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="God not found")
+    god_catalog.invalidate()
     doc = await db["gods"].find_one({"_id": oid})
-    return god_doc_to_schema(doc)
+    return model_response(god_doc_to_schema(doc))
 
 @router.delete("/{god_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_god(
@@ -118,4 +140,5 @@ async def delete_god(
     result = await db["gods"].delete_one({"_id": oid})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="God not found")
+    god_catalog.invalidate()
     return None
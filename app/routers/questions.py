@@ -1,15 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from typing import List
 from bson import ObjectId
 from datetime import datetime
-import pytz
 
 from app.database import get_database
 from app.schemas import Question as QuestionSchema
 from app.dependencies import get_current_active_user
-
-# Set timezone to IST
-IST = pytz.timezone('Asia/Kolkata')
+from app.services.god_catalog import god_catalog
+from app.services.question_catalog import question_catalog
+from app.http_cache import etag_matches, make_etag, not_modified, set_cache_headers
+from app.serialization import model_response, to_ist
 
 router = APIRouter(
     prefix="/questions",
@@ -21,30 +21,19 @@ router = APIRouter(
 def question_doc_to_schema(doc):
     if not doc:
         return None
-    
-    # Convert UTC to IST for API response
-    created_at = doc.get("created_at", datetime.utcnow())
-    if created_at.tzinfo is None:
-        created_at = pytz.utc.localize(created_at)
-    created_at_ist = created_at.astimezone(IST)
-    
-    updated_at = doc.get("updated_at")
-    if updated_at:
-        if updated_at.tzinfo is None:
-            updated_at = pytz.utc.localize(updated_at)
-        updated_at = updated_at.astimezone(IST)
-    
-    return QuestionSchema(
+    return QuestionSchema.model_construct(
         id=str(doc["_id"]),
         question=doc["question"],
         god_id=str(doc["god_id"]),
-        created_at=created_at_ist,
-        updated_at=updated_at
+        created_at=to_ist(doc.get("created_at", datetime.utcnow())),
+        updated_at=to_ist(doc.get("updated_at")),
     )
 
 @router.get("/god/{god_id}", response_model=List[QuestionSchema])
 async def get_questions_for_god(
     god_id: str,
+    request: Request,
+    response: Response,
     db=Depends(get_database),
     current_user=Depends(get_current_active_user)
 ):
@@ -55,11 +44,13 @@ async def get_questions_for_god(
         raise HTTPException(status_code=404, detail="Invalid god ID")
 
     # Check if god exists
-    god = await db["gods"].find_one({"_id": god_oid})
+    god = await god_catalog.get(db, god_oid)
     if not god:
         raise HTTPException(status_code=404, detail="God not found")
 
-    # Get all questions for this god
-    cursor = db["questions"].find({"god_id": god_oid})
-    questions = [question_doc_to_schema(doc) async for doc in cursor]
-    return questions 
\ No newline at end of file
+    # Served from the in-memory catalogue; the ETag changes whenever its contents do
+    etag = make_etag("questions", await question_catalog.get_version(db), god_oid)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_cache_headers(response, etag)
+    return model_response(await question_catalog.for_god(db, god_oid), response) 
\ No newline at end of file
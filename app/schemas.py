@@ -59,10 +59,16 @@ class Message(MessageBase):
     id: str
     conversation_id: str
     created_at: datetime
+    is_fallback: bool = False  # The LLM failed, so this is a canned or cut-short reply rather than a complete one
 
     class Config:
         orm_mode = True
 
+class MessagePage(BaseModel):
+    messages: List[Message]  # Oldest first
+    next_before: Optional[str] = None  # Cursor for the page of older messages, if there is one
+    next_after: Optional[str] = None  # Cursor for messages newer than this page
+
 # Conversation schemas
 class ConversationBase(BaseModel):
     title: str
@@ -90,6 +96,7 @@ class ChatRequest(BaseModel):
 class ChatResponse(BaseModel):
     message: str
     conversation_id: str
+    is_fallback: bool = False
 
 class Question(BaseModel):
     id: str
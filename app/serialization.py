@@ -0,0 +1,73 @@
+"""
+Fast path for turning MongoDB documents into API responses.
+
+Route handlers build their response schemas from database documents with
+`model_construct`, which skips pydantic validation. The documents are written
+by this application, so validating them again on every read only costs time.
+The schemas are returned through `model_response`. Returning a response object
+directly also skips FastAPI's re-validation of the content against the route's
+`response_model`, which is still declared for the OpenAPI schema. Responses are
+rendered with orjson when it is installed.
+"""
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# India has kept a fixed +05:30 offset with no daylight saving since 1945, so a
+# fixed-offset zone matches Asia/Kolkata and converts far faster than pytz
+IST_OFFSET = timedelta(hours=5, minutes=30)
+IST = timezone(IST_OFFSET)
+
+
+def to_ist(value: Optional[datetime]) -> Optional[datetime]:
+    """Convert a datetime stored in MongoDB (naive UTC) to IST for API responses."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        # Shifting by the fixed offset is cheaper than a tz-aware astimezone()
+        return (value + IST_OFFSET).replace(tzinfo=IST)
+    return value.astimezone(IST)
+
+
+def _encode_default(value: Any):
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps_json(content: Any) -> bytes:
+    """Serialise content that may contain pydantic models to compact JSON."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_encode_default)
+    return json.dumps(content, default=_encode_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered by `dumps_json`, so pydantic models can be passed as content."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content)
+
+
+def model_response(content: Any, response: Optional[Response] = None, status_code: int = 200) -> Response:
+    """
+    Render response schemas without re-validating them against the route's response_model.
+
+    Headers set on the route's injected `response` are carried over, as FastAPI
+    only does that for content it serialises itself.
+    """
+    rendered = FastJSONResponse(content, status_code=status_code)
+    if response is not None:
+        rendered.headers.raw.extend(response.headers.raw)
+    return rendered
@@ -0,0 +1,116 @@
+import asyncio
+import hashlib
+import logging
+import re
+from typing import Optional, Tuple
+
+from bson import ObjectId
+
+from app.cache import TTLCache
+from app.config import settings
+from app.metrics import counter
+from app.services.question_catalog import question_catalog
+
+logger = logging.getLogger(__name__)
+
+ANSWER_CACHE_LOOKUPS = counter(
+    "answer_cache_lookups_total",
+    "Suggested-question answer cache lookups",
+    labels=("result",),
+)
+
+AnswerKey = Tuple[ObjectId, str, str]
+
+
+def normalize_question(text: str) -> str:
+    """Lower-case, collapse whitespace and drop trailing punctuation so trivially different spellings match."""
+    return re.sub(r"\s+", " ", text).strip().rstrip("?!.").strip().lower()
+
+
+def prompt_hash(system_prompt: str) -> str:
+    return hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()[:16]
+
+
+class AnswerCache:
+    """
+    Cache of god replies to the curated questions in the `questions` collection.
+
+    Answers are keyed on (god_id, normalised question, system prompt hash), so
+    editing a god's system prompt makes its old answers unreachable. Only the
+    opening message of a conversation is answered from the cache: later turns
+    depend on the history and must go to the LLM. The curated questions come
+    from the in-memory question catalogue.
+    """
+
+    def __init__(self, maxsize: int, ttl_seconds: float):
+        self._answers = TTLCache(maxsize=maxsize, ttl_seconds=ttl_seconds)
+
+    async def key_for(self, db, god_id: ObjectId, message: str, system_prompt: str) -> Optional[AnswerKey]:
+        """Return the cache key for a message, or None if it isn't one of the god's curated questions."""
+        question = normalize_question(message)
+        curated = await question_catalog.for_god(db, god_id)
+        if not any(normalize_question(doc.question) == question for doc in curated):
+            return None
+        return (god_id, question, prompt_hash(system_prompt))
+
+    def get(self, key: AnswerKey) -> Optional[str]:
+        answer = self._answers.get(key)
+        ANSWER_CACHE_LOOKUPS.inc(result="miss" if answer is None else "hit")
+        return answer
+
+    def set(self, key: AnswerKey, answer: str):
+        self._answers.set(key, answer)
+
+    def clear(self):
+        self._answers.clear()
+
+    async def warm(self, db, concurrency: int):
+        """
+        Generate and cache an answer to every curated question.
+
+        Questions that are already cached are skipped, and failed generations
+        (the fallback reply) are not stored.
+        """
+        from app.services.context_builder import estimate_prompt_tokens
+        from app.services.god_catalog import god_catalog
+        from app.services.llm_limiter import LLMAdmissionRejectedError
+        from app.services.openai_service import MAX_TOKENS, OpenAIService
+        from app.services.semantic_cache import get_semantic_cache
+
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+        async def warm_one(doc):
+            god = await god_catalog.get(db, doc.god_id)
+            if not god:
+                return False
+            system_prompt = god.get("system_prompt", "")
+            key = (god["_id"], normalize_question(doc.question), prompt_hash(system_prompt))
+            if key in self._answers:
+                return False
+            messages = [{"role": "user", "content": doc.question}]
+            async with semaphore:
+                try:
+                    reply = await OpenAIService.generate_response(
+                        messages=messages,
+                        system_prompt=system_prompt,
+                        estimated_tokens=estimate_prompt_tokens(system_prompt, messages) + MAX_TOKENS,
+                    )
+                except LLMAdmissionRejectedError:
+                    return False
+            if reply.is_fallback:
+                return False
+            self.set(key, reply.text)
+            semantic_cache = get_semantic_cache()
+            if semantic_cache is not None:
+                await semantic_cache.add(god["_id"], doc.question, system_prompt, reply.text)
+            return True
+
+        docs = await question_catalog.all(db)
+        results = await asyncio.gather(*(warm_one(doc) for doc in docs))
+        logger.info(f"Answer cache warmed with {sum(results)} of {len(docs)} suggested questions")
+
+
+answer_cache = AnswerCache(
+    maxsize=settings.ANSWER_CACHE_MAX_SIZE,
+    ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS,
+)
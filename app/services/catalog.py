@@ -0,0 +1,71 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from typing import Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Catalog(ABC):
+    """
+    In-memory copy of a small, rarely changing collection.
+
+    The collection is loaded once, ordered by _id, and reloaded after
+    `ttl_seconds` so changes made by other workers or by scripts are picked up,
+    or on the next lookup after `invalidate()`. Subclasses index the loaded
+    documents in `_index`.
+
+    `version` is a hash of the catalogue's contents. Every worker holding the
+    same documents computes the same version, so it can back HTTP ETags.
+    """
+
+    collection: str
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self.version = ""
+
+    @abstractmethod
+    def _index(self, docs: List[dict]):
+        """Replace the catalogue's contents with `docs`, which are ordered by _id."""
+
+    @abstractmethod
+    def _documents(self) -> Iterable[dict]:
+        """Return every document in the catalogue."""
+
+    async def load(self, db):
+        """Load every document from the database, replacing the current catalogue."""
+        docs = await db[self.collection].find().sort("_id", 1).to_list(length=None)
+        self._index(docs)
+        self._update_version()
+        self._loaded_at = time.monotonic()
+        logger.info(f"{self.collection.capitalize()} catalogue loaded with {len(docs)} documents")
+
+    def _update_version(self):
+        contents = json.dumps(sorted(self._documents(), key=lambda doc: doc["_id"]), sort_keys=True, default=str)
+        self.version = hashlib.sha256(contents.encode("utf-8")).hexdigest()
+
+    def invalidate(self):
+        """Mark the catalogue as stale so the next lookup reloads it."""
+        self._loaded_at = None
+
+    def _is_stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl_seconds
+
+    async def _ensure_fresh(self, db):
+        if not self._is_stale():
+            return
+        async with self._lock:
+            # Another request may have reloaded while we were waiting
+            if self._is_stale():
+                await self.load(db)
+
+    async def get_version(self, db) -> str:
+        """Return the version of the current catalogue, reloading it first if it is stale."""
+        await self._ensure_fresh(db)
+        return self.version
@@ -0,0 +1,78 @@
+import logging
+from typing import Any, Dict, List, Tuple
+
+from pymongo import UpdateOne
+
+from app.services.tokenizer import count_prompt_tokens, count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Tokens the chat format adds around every message (role and separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def message_token_count(message: Dict[str, Any]) -> int:
+    """
+    Return the token count of a message document, computing and storing it on the
+    document if it hasn't been counted yet.
+    """
+    if message.get("token_count") is None:
+        message["token_count"] = count_tokens(message["content"])
+    return message["token_count"]
+
+
+def build_context(system_prompt: str, history: List[Dict[str, Any]], token_budget: int) -> Tuple[List[Dict[str, str]], int]:
+    """
+    Select the most recent messages that fit in the token budget.
+
+    The budget covers the system prompt plus the selected history. Messages are
+    taken newest first until the next one would exceed the budget; the newest
+    message is always included so the user's question is never dropped.
+
+    Args:
+        system_prompt: The god's system prompt
+        history: Message documents in chronological order, each with 'content'
+            and 'is_from_user' and optionally a cached 'token_count'
+        token_budget: Maximum prompt tokens to spend
+
+    Returns:
+        List of message dictionaries with 'role' and 'content', oldest first,
+        and the prompt tokens they use together with the system prompt
+    """
+    remaining = token_budget - count_prompt_tokens(system_prompt) - MESSAGE_OVERHEAD_TOKENS
+    selected = []
+    for message in reversed(history):
+        cost = message_token_count(message) + MESSAGE_OVERHEAD_TOKENS
+        if selected and cost > remaining:
+            break
+        remaining -= cost
+        selected.append({
+            "role": "user" if message.get("is_from_user", True) else "assistant",
+            "content": message["content"],
+        })
+    selected.reverse()
+    return selected, token_budget - remaining
+
+
+def estimate_prompt_tokens(system_prompt: str, messages: List[Dict[str, str]]) -> int:
+    """Estimate the prompt tokens of a chat request built by `build_context`."""
+    total = count_prompt_tokens(system_prompt) + MESSAGE_OVERHEAD_TOKENS
+    for message in messages:
+        total += count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+    return total
+
+
+async def store_token_counts(db, messages: List[Dict[str, Any]]):
+    """Persist token counts computed for messages that were stored without one."""
+    updates = [
+        UpdateOne({"_id": message["_id"]}, {"$set": {"token_count": message["token_count"]}})
+        for message in messages
+        if "_id" in message and message.get("token_count") is not None
+    ]
+    if not updates:
+        return
+    try:
+        await db["messages"].bulk_write(updates, ordered=False)
+    except Exception as e:
+        # Counts are only a cache; they will be computed again next time
+        logger.warning(f"Failed to store message token counts: {str(e)}")
@@ -0,0 +1,82 @@
+import bisect
+from typing import Dict, List, Optional, Union
+
+from bson import ObjectId
+
+from app.config import settings
+from app.schemas import God as GodSchema
+from app.services.catalog import Catalog
+
+
+class GodCatalog(Catalog):
+    """
+    In-memory copy of the `gods` collection.
+
+    Gods are served from memory, indexed by id, with pre-built God schema
+    objects. The god create/update/delete handlers
+    call `invalidate()` so their changes are picked up straight away.
+    """
+
+    collection = "gods"
+
+    def __init__(self, ttl_seconds: int):
+        super().__init__(ttl_seconds)
+        self._docs_by_id: Dict[ObjectId, dict] = {}
+        self._schemas_by_id: Dict[ObjectId, GodSchema] = {}
+        self._sorted_ids: List[ObjectId] = []
+
+    def _index(self, docs: List[dict]):
+        from app.routers.gods import god_doc_to_schema
+
+        self._docs_by_id = {doc["_id"]: doc for doc in docs}
+        self._schemas_by_id = {doc["_id"]: god_doc_to_schema(doc) for doc in docs}
+        self._sorted_ids = list(self._docs_by_id)
+
+    def _documents(self):
+        return self._docs_by_id.values()
+
+    def _remember(self, doc: dict):
+        from app.routers.gods import god_doc_to_schema
+
+        self._docs_by_id[doc["_id"]] = doc
+        self._schemas_by_id[doc["_id"]] = god_doc_to_schema(doc)
+        # Gods found by lookup arrive in any order; keep the catalogue ordered by id
+        self._sorted_ids = sorted(self._docs_by_id)
+        self._schemas_by_id = {god_id: self._schemas_by_id[god_id] for god_id in self._sorted_ids}
+        self._update_version()
+
+    async def get(self, db, god_id: Union[str, ObjectId]) -> Optional[dict]:
+        """Return the raw god document, or None if it does not exist."""
+        if not isinstance(god_id, ObjectId):
+            try:
+                god_id = ObjectId(god_id)
+            except Exception:
+                return None
+        await self._ensure_fresh(db)
+        doc = self._docs_by_id.get(god_id)
+        if doc is None:
+            # The god may have been created by another worker since the last load
+            doc = await db["gods"].find_one({"_id": god_id})
+            if doc is not None:
+                self._remember(doc)
+        return doc
+
+    async def get_schema(self, db, god_id: Union[str, ObjectId]) -> Optional[GodSchema]:
+        """Return the God schema for an id, or None if it does not exist."""
+        doc = await self.get(db, god_id)
+        if doc is None:
+            return None
+        return self._schemas_by_id[doc["_id"]]
+
+    async def all(self, db) -> List[GodSchema]:
+        """Return every god schema, ordered by id."""
+        await self._ensure_fresh(db)
+        return list(self._schemas_by_id.values())
+
+    async def position_after(self, db, god_id: ObjectId) -> int:
+        """Return the index in `all()` of the first god whose id sorts after `god_id`."""
+        await self._ensure_fresh(db)
+        return bisect.bisect_right(self._sorted_ids, god_id)
+
+
+god_catalog = GodCatalog(ttl_seconds=settings.GOD_CATALOG_TTL_SECONDS)
@@ -0,0 +1,187 @@
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+
+from app.config import settings
+from app.metrics import counter, gauge, histogram
+
+LLM_ADMISSION_QUEUE_DEPTH = gauge(
+    "llm_admission_queue_depth",
+    "LLM calls waiting for admission",
+)
+LLM_ADMISSION_IN_FLIGHT = gauge(
+    "llm_admission_in_flight",
+    "LLM calls admitted and not yet finished",
+)
+LLM_ADMISSION_WAIT_SECONDS = histogram(
+    "llm_admission_wait_seconds",
+    "Time LLM calls waited for admission",
+)
+LLM_ADMISSION_REJECTED = counter(
+    "llm_admission_rejected_total",
+    "LLM calls rejected by admission control",
+    labels=("reason",),
+)
+
+
+class LLMAdmissionRejectedError(Exception):
+    """Raised when an LLM call can't be admitted; `retry_after` suggests when to try again."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMAdmission:
+    """An admitted LLM call. `release()` may be called more than once; only the first call counts."""
+
+    def __init__(self, controller: "LLMAdmissionController"):
+        self._controller = controller
+        self.released = False
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self._controller._release()
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `per_minute` tokens per minute, holding at most a minute's worth."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.tokens = per_minute
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available (0 if they are now)."""
+        self._refill()
+        # A request larger than the bucket only has to wait for a full bucket
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float):
+        self.tokens -= min(amount, self.capacity)
+
+    def refund(self, amount: float):
+        """Return tokens taken for a call that was never admitted."""
+        self.tokens = min(self.capacity, self.tokens + min(amount, self.capacity))
+
+
+class LLMAdmissionController:
+    """
+    Admission control in front of the LLM provider.
+
+    A call is admitted once the requests-per-minute and tokens-per-minute
+    buckets both have room for it and fewer than `max_concurrency` calls are
+    in flight. Waiting calls are admitted in arrival order. A call is rejected
+    straight away when `max_queue` calls are already waiting, and after
+    `max_wait` seconds if it still hasn't been admitted. A per-minute limit of
+    0 disables that bucket.
+    """
+
+    def __init__(self, max_concurrency: int, requests_per_minute: float, tokens_per_minute: float, max_queue: int, max_wait: float):
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._semaphore = asyncio.Semaphore(max(max_concurrency, 1))
+        self._requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self._order = asyncio.Lock()
+        self._waiting = 0
+        self._in_flight = 0
+
+    def _reject(self, reason: str, retry_after: float):
+        LLM_ADMISSION_REJECTED.inc(reason=reason)
+        raise LLMAdmissionRejectedError(f"LLM call rejected by admission control ({reason})", retry_after)
+
+    def _refund(self, estimated_tokens: int):
+        if self._requests:
+            self._requests.refund(1)
+        if self._tokens:
+            self._tokens.refund(estimated_tokens)
+
+    def _bucket_wait(self, estimated_tokens: int) -> float:
+        wait = 0.0
+        if self._requests:
+            wait = max(wait, self._requests.wait_time(1))
+        if self._tokens:
+            wait = max(wait, self._tokens.wait_time(estimated_tokens))
+        return wait
+
+    async def acquire(self, estimated_tokens: int) -> LLMAdmission:
+        """Wait until a call using about `estimated_tokens` tokens may proceed, and return its admission."""
+        if self._waiting >= self.max_queue:
+            self._reject("queue_full", self.max_wait)
+        queued_at = time.monotonic()
+        deadline = queued_at + self.max_wait
+        self._waiting += 1
+        LLM_ADMISSION_QUEUE_DEPTH.set(self._waiting)
+        try:
+            async with self._order:
+                while True:
+                    wait = self._bucket_wait(estimated_tokens)
+                    if wait == 0:
+                        break
+                    if time.monotonic() + wait > deadline:
+                        self._reject("rate_limit", wait)
+                    await asyncio.sleep(wait)
+                if self._requests:
+                    self._requests.take(1)
+                if self._tokens:
+                    self._tokens.take(estimated_tokens)
+            try:
+                if not self._semaphore.locked():
+                    # A free slot is taken straight away, even if the deadline has passed
+                    await self._semaphore.acquire()
+                else:
+                    await asyncio.wait_for(self._semaphore.acquire(), timeout=max(deadline - time.monotonic(), 0))
+            except asyncio.TimeoutError:
+                self._refund(estimated_tokens)
+                self._reject("concurrency", 1)
+            except BaseException:
+                # Cancelled while waiting for a slot; the call never ran, so it costs nothing
+                self._refund(estimated_tokens)
+                raise
+        finally:
+            self._waiting -= 1
+            LLM_ADMISSION_QUEUE_DEPTH.set(self._waiting)
+        LLM_ADMISSION_WAIT_SECONDS.observe(time.monotonic() - queued_at)
+        self._in_flight += 1
+        LLM_ADMISSION_IN_FLIGHT.set(self._in_flight)
+        return LLMAdmission(self)
+
+    def _release(self):
+        self._in_flight -= 1
+        LLM_ADMISSION_IN_FLIGHT.set(self._in_flight)
+        self._semaphore.release()
+
+    @asynccontextmanager
+    async def admitted(self, estimated_tokens: int):
+        admission = await self.acquire(estimated_tokens)
+        try:
+            yield admission
+        finally:
+            admission.release()
+
+
+def retry_after_header(error: LLMAdmissionRejectedError) -> str:
+    """Format a rejection's retry delay as a Retry-After header value (whole seconds, at least 1)."""
+    return str(max(1, math.ceil(error.retry_after)))
+
+
+llm_limiter = LLMAdmissionController(
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+    tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+    max_queue=settings.LLM_ADMISSION_MAX_QUEUE,
+    max_wait=settings.LLM_ADMISSION_MAX_WAIT_SECONDS,
+)
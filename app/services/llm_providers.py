@@ -0,0 +1,202 @@
+"""
+LLM backends behind OpenAIService.
+
+`get_provider()` returns the backend selected by `settings.LLM_PROVIDER`:
+
+- "openai": the OpenAI chat completions API
+- "fake": a deterministic local stand-in that simulates latency and token
+  rates without any network access, for load testing the rest of the stack
+"""
+import asyncio
+import hashlib
+import logging
+import random
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+from openai import AsyncOpenAI
+
+from app.config import settings
+from app.metrics import counter
+
+logger = logging.getLogger(__name__)
+
+LLM_TOKENS = counter(
+    "llm_tokens_total",
+    "Tokens sent to and received from the LLM provider",
+    labels=("model", "type"),
+)
+
+# The HTTP and OpenAI clients are created by the FastAPI lifespan handler (see
+# main.py) so that pool and timeout settings come from Settings and open
+# connections are closed on shutdown
+http_client: Optional[httpx.AsyncClient] = None
+client: Optional[AsyncOpenAI] = None
+
+def init_openai_client() -> AsyncOpenAI:
+    global http_client, client
+    if client is None:
+        http2 = settings.OPENAI_HTTP2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("OPENAI_HTTP2 is enabled but the h2 package is not installed, falling back to HTTP/1.1")
+                http2 = False
+        timeout = httpx.Timeout(
+            connect=settings.OPENAI_HTTP_CONNECT_TIMEOUT,
+            read=settings.OPENAI_HTTP_READ_TIMEOUT,
+            write=settings.OPENAI_HTTP_WRITE_TIMEOUT,
+            pool=settings.OPENAI_HTTP_POOL_TIMEOUT,
+        )
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.OPENAI_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OPENAI_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.OPENAI_HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=timeout,
+            http2=http2,
+        )
+        # The OpenAI client applies its own per-request timeout, so pass ours explicitly.
+        # Retries are handled by app.services.resilience, so the client's own are disabled.
+        client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY, http_client=http_client, timeout=timeout, max_retries=0)
+    return client
+
+async def close_openai_client():
+    global http_client, client
+    if http_client is not None:
+        await http_client.aclose()
+    http_client = None
+    client = None
+
+def get_openai_client() -> AsyncOpenAI:
+    # Create the client lazily if the app is used without running its lifespan handler
+    return client if client is not None else init_openai_client()
+
+
+class LLMProvider(ABC):
+    """Interface every LLM backend implements."""
+
+    name = "base"
+
+    @property
+    @abstractmethod
+    def model(self) -> str:
+        """Model name, used in metrics and request keys."""
+
+    @abstractmethod
+    async def complete(self, messages: List[Dict[str, str]], max_tokens: int, temperature: float) -> str:
+        """Return the full completion for `messages`, which already include the system prompt."""
+
+    @abstractmethod
+    def stream(self, messages: List[Dict[str, str]], max_tokens: int, temperature: float) -> AsyncIterator[str]:
+        """Yield the completion for `messages` as text deltas."""
+
+
+class OpenAIProvider(LLMProvider):
+    name = "openai"
+
+    @property
+    def model(self) -> str:
+        return settings.OPENAI_MODEL
+
+    async def complete(self, messages, max_tokens, temperature):
+        response = await get_openai_client().chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+        )
+        if response.usage:
+            LLM_TOKENS.inc(response.usage.prompt_tokens, model=self.model, type="prompt")
+            LLM_TOKENS.inc(response.usage.completion_tokens, model=self.model, type="completion")
+        return response.choices[0].message.content.strip()
+
+    async def stream(self, messages, max_tokens, temperature):
+        stream = await get_openai_client().chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True,
+        )
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                # Streamed responses carry no usage block; each content chunk is one token
+                LLM_TOKENS.inc(model=self.model, type="completion")
+                yield delta
+
+
+class FakeLLMProvider(LLMProvider):
+    """
+    Deterministic local stand-in for load testing.
+
+    Replies are built from a fixed vocabulary seeded by a hash of the prompt, so
+    the same prompt always produces the same reply. Each call waits
+    `latency_ms` before the first token and then produces tokens at
+    `tokens_per_second`.
+    """
+
+    name = "fake"
+
+    VOCABULARY = (
+        "peace", "devotion", "child", "wisdom", "path", "light", "truth", "patience",
+        "strength", "faith", "heart", "duty", "compassion", "mind", "courage", "grace",
+    )
+
+    def __init__(self, latency_ms: float, tokens_per_second: float, response_tokens: int):
+        self.latency_ms = latency_ms
+        self.tokens_per_second = tokens_per_second
+        self.response_tokens = response_tokens
+
+    @property
+    def model(self) -> str:
+        return "fake"
+
+    def _tokens(self, messages: List[Dict[str, str]], max_tokens: int) -> List[str]:
+        prompt = "\n".join(f"{message['role']}:{message['content']}" for message in messages)
+        rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).digest())
+        count = min(self.response_tokens, max_tokens)
+        words = [rng.choice(self.VOCABULARY) for _ in range(count)]
+        # Every word after the first carries its leading space, like real token deltas
+        return [words[0].capitalize()] + [f" {word}" for word in words[1:]] if words else []
+
+    async def complete(self, messages, max_tokens, temperature):
+        tokens = self._tokens(messages, max_tokens)
+        LLM_TOKENS.inc(len(tokens), model=self.model, type="completion")
+        await asyncio.sleep(self.latency_ms / 1000 + len(tokens) / self.tokens_per_second)
+        return "".join(tokens) + "."
+
+    async def stream(self, messages, max_tokens, temperature):
+        tokens = self._tokens(messages, max_tokens)
+        await asyncio.sleep(self.latency_ms / 1000)
+        for token in tokens:
+            await asyncio.sleep(1 / self.tokens_per_second)
+            LLM_TOKENS.inc(model=self.model, type="completion")
+            yield token
+        yield "."
+
+
+_provider: Optional[LLMProvider] = None
+
+def get_provider() -> LLMProvider:
+    """Return the configured LLM provider, creating it on first use."""
+    global _provider
+    if _provider is None:
+        if settings.LLM_PROVIDER == "openai":
+            _provider = OpenAIProvider()
+        elif settings.LLM_PROVIDER == "fake":
+            _provider = FakeLLMProvider(
+                latency_ms=settings.FAKE_LLM_LATENCY_MS,
+                tokens_per_second=settings.FAKE_LLM_TOKENS_PER_SECOND,
+                response_tokens=settings.FAKE_LLM_RESPONSE_TOKENS,
+            )
+        else:
+            raise ValueError(f"Unknown LLM_PROVIDER '{settings.LLM_PROVIDER}', expected 'openai' or 'fake'")
+        logger.info(f"Using the {_provider.name} LLM provider")
+    return _provider
@@ -1,66 +1,216 @@
-from openai import AsyncOpenAI
-from typing import List, Dict, Any
-import httpx
+from typing import List, Dict, AsyncIterator, NamedTuple
+import asyncio
+import hashlib
+import json
+import logging
+import time
 from app.config import settings
+from app.metrics import counter, histogram
+from app.services.llm_limiter import LLMAdmissionRejectedError, llm_limiter
+from app.services.llm_providers import get_provider
+from app.services.resilience import CircuitOpenError, call_with_retries, llm_breaker
 
-# Initialize the OpenAI client with a custom HTTP client
-http_client = httpx.AsyncClient()
-client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY, http_client=http_client)
+logger = logging.getLogger(__name__)
+
+MAX_TOKENS = 550
+TEMPERATURE = 0.8
+
+FALLBACK_RESPONSE = "I apologize, but I am unable to respond at the moment. Please try again later."
+
+class LLMReply(NamedTuple):
+    text: str
+    is_fallback: bool = False  # The LLM failed and `text` is the canned apology
+
+FALLBACK_REPLY = LLMReply(FALLBACK_RESPONSE, is_fallback=True)
+
+LLM_REQUEST_DURATION = histogram(
+    "llm_request_duration_seconds",
+    "Duration of LLM calls, from request until the full response was received",
+    labels=("model", "mode", "outcome"),
+)
+
+LLM_TIME_TO_FIRST_TOKEN = histogram(
+    "llm_time_to_first_token_seconds",
+    "Time from sending a streaming completion request to receiving the first token",
+    labels=("model",),
+)
+
+LLM_DEDUPLICATED_REQUESTS = counter(
+    "llm_deduplicated_requests_total",
+    "LLM completions served by joining an identical in-flight request",
+    labels=("model",),
+)
+
+# Completions currently in flight, by request key, shared by identical concurrent requests
+_in_flight: Dict[str, "SharedCompletion"] = {}
+
+class LLMUnavailableError(Exception):
+    """Raised by a response stream when the provider fails before producing any text."""
+
+class LLMStreamInterruptedError(Exception):
+    """Raised by a response stream when the provider fails after text has already been yielded."""
+
+def request_key(model: str, messages: List[Dict[str, str]], max_tokens: int, temperature: float) -> str:
+    """Hash everything that determines a completion request."""
+    payload = json.dumps(
+        {"model": model, "messages": messages, "max_tokens": max_tokens, "temperature": temperature},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class SharedCompletion:
+    """
+    One completion on behalf of every identical request that joins it.
+
+    The completion runs in its own task, which first takes a single admission
+    from llm_limiter for all of them; `admitted` resolves once that admission
+    is granted, or with LLMAdmissionRejectedError.
+    """
+
+    def __init__(self, provider, full_messages: List[Dict[str, str]], estimated_tokens: int):
+        self.admitted: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        self.task = asyncio.ensure_future(self._run(provider, full_messages, estimated_tokens))
+
+    async def _run(self, provider, full_messages, estimated_tokens) -> LLMReply:
+        try:
+            admission = await llm_limiter.acquire(estimated_tokens)
+        except BaseException as e:
+            if not isinstance(e, LLMAdmissionRejectedError):
+                e = LLMAdmissionRejectedError("LLM call was abandoned before it was admitted", 1)
+            self.admitted.set_exception(e)
+            raise
+        self.admitted.set_result(None)
+        try:
+            return await OpenAIService._complete(provider, full_messages)
+        finally:
+            admission.release()
+
+def _forget_completion(key: str, task: "asyncio.Future[LLMReply]"):
+    _in_flight.pop(key, None)
+    # Rejections are reported through `admitted`; don't warn that nobody read them here
+    if not task.cancelled():
+        task.exception()
 
 class OpenAIService:
     @staticmethod
-    async def generate_response(messages: List[Dict[str, str]], system_prompt: str) -> str:
+    async def admit_response(messages: List[Dict[str, str]], system_prompt: str, estimated_tokens: int) -> "asyncio.Future[LLMReply]":
         """
-        Generate a response using the OpenAI API.
+        Wait for a completion to be admitted by llm_limiter and return a future for its reply.
+        
+        Identical concurrent requests (same model, parameters, system prompt and
+        messages) share a single upstream call, and only that call is charged
+        against the LLM limits. The shared call is shielded, so a caller that is
+        cancelled doesn't cancel it for the others.
         
         Args:
             messages: List of message dictionaries with 'role' and 'content'
             system_prompt: The system prompt to set the god's personality
+            estimated_tokens: Prompt plus completion tokens to charge the limiter
             
         Returns:
-            The generated response text
+            A future resolving to the generated reply, or FALLBACK_REPLY (with
+            `is_fallback` set) if the provider failed
+        
+        Raises:
+            LLMAdmissionRejectedError: The call couldn't be admitted
         """
+        provider = get_provider()
+        # Prepend the system message to set the god's personality
+        full_messages = [{"role": "system", "content": system_prompt}]
+        full_messages.extend(messages)
+        key = request_key(provider.model, full_messages, MAX_TOKENS, TEMPERATURE)
+        shared = _in_flight.get(key) if settings.LLM_COALESCE_REQUESTS else None
+        if shared is None:
+            shared = SharedCompletion(provider, full_messages, estimated_tokens)
+            if settings.LLM_COALESCE_REQUESTS:
+                _in_flight[key] = shared
+            shared.task.add_done_callback(lambda task: _forget_completion(key, task))
+        else:
+            LLM_DEDUPLICATED_REQUESTS.inc(model=provider.model)
+        await asyncio.shield(shared.admitted)
+        return asyncio.shield(shared.task)
+
+    @staticmethod
+    async def generate_response(messages: List[Dict[str, str]], system_prompt: str, estimated_tokens: int) -> LLMReply:
+        """Admit and generate a response in one step; see `admit_response`."""
+        return await (await OpenAIService.admit_response(messages, system_prompt, estimated_tokens))
+
+    @staticmethod
+    async def _complete(provider, full_messages: List[Dict[str, str]]) -> LLMReply:
+        started_at = time.perf_counter()
         try:
-            # Prepend the system message to set the god's personality
-            full_messages = [{"role": "system", "content": system_prompt}]
-            full_messages.extend(messages)
-            
-            # Call the OpenAI API
-            response = await client.chat.completions.create(
-                model=settings.OPENAI_MODEL,
-                messages=full_messages,
-                max_tokens=550,
-                temperature=0.8,
+            # Call the configured LLM provider, retrying transient failures
+            response_text = await call_with_retries(
+                lambda: provider.complete(full_messages, max_tokens=MAX_TOKENS, temperature=TEMPERATURE),
+                llm_breaker,
             )
-            
-            # Extract and return the generated text
-            return response.choices[0].message.content.strip()
+            LLM_REQUEST_DURATION.observe(time.perf_counter() - started_at, model=provider.model, mode="complete", outcome="success")
+            return LLMReply(response_text)
+        except CircuitOpenError:
+            LLM_REQUEST_DURATION.observe(time.perf_counter() - started_at, model=provider.model, mode="complete", outcome="rejected")
+            return FALLBACK_REPLY
         except Exception as e:
+            LLM_REQUEST_DURATION.observe(time.perf_counter() - started_at, model=provider.model, mode="complete", outcome="error")
             # Log the error and return a fallback message
-            print(f"Error generating response from OpenAI: {str(e)}")
-            return "I apologize, but I am unable to respond at the moment. Please try again later."
-    
+            logger.error(f"Error generating response from the LLM provider: {str(e)}")
+            return FALLBACK_REPLY
+
     @staticmethod
-    def format_conversation_history(messages: List[Any]) -> List[Dict[str, str]]:
+    async def generate_response_stream(messages: List[Dict[str, str]], system_prompt: str) -> AsyncIterator[str]:
         """
-        Format the conversation history into the format expected by the OpenAI API.
-        Limits the history to the last 5 messages to optimize token usage and maintain context.
+        Stream a response from the configured LLM provider, yielding text deltas as they arrive.
         
         Args:
-            messages: List of Message objects from the database
+            messages: List of message dictionaries with 'role' and 'content'
+            system_prompt: The system prompt to set the god's personality
             
-        Returns:
-            List of message dictionaries with 'role' and 'content'
-        """
-        # Take only the last 5 messages
-        recent_messages = messages[-5:] if len(messages) > 5 else messages
+        Yields:
+            Chunks of the generated response text.
         
-        formatted_messages = []
-        for message in recent_messages:
-            role = "user" if message.is_from_user else "assistant"
-            formatted_messages.append({
-                "role": role,
-                "content": message.content
-            })
+        Raises:
+            LLMUnavailableError: The provider failed before producing any text;
+                callers should fall back to FALLBACK_RESPONSE.
+            LLMStreamInterruptedError: The provider failed after text was yielded,
+                so the reply is incomplete.
         
-        return formatted_messages
+        Failures before the first token are retried like non-streaming calls,
+        with the per-attempt deadline applying to the first token; once text
+        has been sent to the client the stream can't be retried.
+        """
+        full_messages = [{"role": "system", "content": system_prompt}]
+        full_messages.extend(messages)
+        
+        provider = get_provider()
+        started_at = time.perf_counter()
+        received_first_token = False
+
+        async def open_stream():
+            stream = provider.stream(full_messages, max_tokens=MAX_TOKENS, temperature=TEMPERATURE)
+            try:
+                return stream, await stream.__anext__()
+            except StopAsyncIteration:
+                return stream, None
+            except BaseException:
+                await stream.aclose()
+                raise
+
+        try:
+            stream, first_delta = await call_with_retries(open_stream, llm_breaker)
+            received_first_token = True
+            LLM_TIME_TO_FIRST_TOKEN.observe(time.perf_counter() - started_at, model=provider.model)
+            if first_delta is not None:
+                yield first_delta
+                async for delta in stream:
+                    yield delta
+            LLM_REQUEST_DURATION.observe(time.perf_counter() - started_at, model=provider.model, mode="stream", outcome="success")
+        except CircuitOpenError:
+            LLM_REQUEST_DURATION.observe(time.perf_counter() - started_at, model=provider.model, mode="stream", outcome="rejected")
+            raise LLMUnavailableError("LLM circuit breaker is open")
+        except Exception as e:
+            LLM_REQUEST_DURATION.observe(time.perf_counter() - started_at, model=provider.model, mode="stream", outcome="error")
+            logger.exception("Error streaming response from the LLM provider")
+            if not received_first_token:
+                raise LLMUnavailableError(str(e)) from e
+            raise LLMStreamInterruptedError(str(e)) from e
+
@@ -0,0 +1,103 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from passlib.context import CryptContext
+
+from app.config import settings
+from app.metrics import counter, gauge, histogram
+
+PASSWORD_HASH_SECONDS = histogram(
+    "password_hash_seconds",
+    "Time spent hashing or verifying a password in the worker pool",
+    labels=("operation",),
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, 5.0),
+)
+PASSWORD_HASH_QUEUE_WAIT_SECONDS = histogram(
+    "password_hash_queue_wait_seconds",
+    "Time a password operation waited for a free worker",
+    labels=("operation",),
+)
+PASSWORD_HASH_PENDING = gauge(
+    "password_hash_pending",
+    "Password operations currently running or waiting for a worker",
+)
+PASSWORD_HASH_REJECTED = counter(
+    "password_hash_rejected_total",
+    "Password operations rejected because the queue was full",
+    labels=("operation",),
+)
+
+
+class PasswordHashQueueFullError(Exception):
+    """Raised when too many password operations are already waiting."""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification on a dedicated, bounded thread pool.
+
+    bcrypt releases the GIL while it works, so a thread pool keeps the event loop
+    free without the overhead of a process pool. At most `workers` operations run
+    at once and at most `max_queue` more may wait; beyond that callers get a
+    PasswordHashQueueFullError instead of piling up behind a login storm.
+
+    The pool is created by `start()`, which the lifespan handler calls, or on
+    first use, and `shutdown()` discards it, so the app can be started again
+    in the same process.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self._context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+    def start(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        return self._executor
+
+    async def _run(self, operation: str, func, *args):
+        if self._pending >= self.workers + self.max_queue:
+            PASSWORD_HASH_REJECTED.inc(operation=operation)
+            raise PasswordHashQueueFullError(f"Too many pending password operations ({self._pending})")
+
+        queued_at = time.perf_counter()
+
+        def timed_call():
+            started_at = time.perf_counter()
+            result = func(*args)
+            return result, started_at - queued_at, time.perf_counter() - started_at
+
+        self._pending += 1
+        PASSWORD_HASH_PENDING.set(self._pending)
+        try:
+            loop = asyncio.get_running_loop()
+            result, queue_wait, duration = await loop.run_in_executor(self.start(), timed_call)
+        finally:
+            self._pending -= 1
+            PASSWORD_HASH_PENDING.set(self._pending)
+
+        PASSWORD_HASH_QUEUE_WAIT_SECONDS.observe(queue_wait, operation=operation)
+        PASSWORD_HASH_SECONDS.observe(duration, operation=operation)
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", self._context.hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run("verify", self._context.verify, plain_password, hashed_password)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
@@ -0,0 +1,49 @@
+from typing import Dict, List
+
+from bson import ObjectId
+
+from app.config import settings
+from app.schemas import Question as QuestionSchema
+from app.services.catalog import Catalog
+
+
+class QuestionCatalog(Catalog):
+    """
+    In-memory copy of the `questions` collection, grouped by god.
+
+    Questions are only edited by scripts, so changes are picked up when the
+    catalogue is reloaded.
+    """
+
+    collection = "questions"
+
+    def __init__(self, ttl_seconds: int):
+        super().__init__(ttl_seconds)
+        self._docs: List[dict] = []
+        self._schemas: List[QuestionSchema] = []
+        self._schemas_by_god: Dict[ObjectId, List[QuestionSchema]] = {}
+
+    def _index(self, docs: List[dict]):
+        from app.routers.questions import question_doc_to_schema
+
+        self._docs = docs
+        self._schemas = [question_doc_to_schema(doc) for doc in docs]
+        self._schemas_by_god = {}
+        for doc, schema in zip(docs, self._schemas):
+            self._schemas_by_god.setdefault(doc["god_id"], []).append(schema)
+
+    def _documents(self):
+        return self._docs
+
+    async def for_god(self, db, god_id: ObjectId) -> List[QuestionSchema]:
+        """Return the Question schemas for a god, ordered by id."""
+        await self._ensure_fresh(db)
+        return self._schemas_by_god.get(god_id, [])
+
+    async def all(self, db) -> List[QuestionSchema]:
+        """Return every Question schema, ordered by id."""
+        await self._ensure_fresh(db)
+        return self._schemas
+
+
+question_catalog = QuestionCatalog(ttl_seconds=settings.QUESTION_CATALOG_TTL_SECONDS)
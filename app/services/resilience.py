@@ -0,0 +1,181 @@
+import asyncio
+import email.utils
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from openai import APIConnectionError, APIStatusError
+
+from app.config import settings
+from app.metrics import counter, gauge
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+LLM_RETRIES = counter(
+    "llm_retries_total",
+    "LLM calls retried after a transient failure",
+    labels=("reason",),
+)
+LLM_CIRCUIT_REJECTIONS = counter(
+    "llm_circuit_rejections_total",
+    "LLM calls rejected without being attempted because the circuit breaker was open",
+)
+LLM_CIRCUIT_STATE = gauge(
+    "llm_circuit_state",
+    "State of the LLM circuit breaker (0 closed, 1 half-open, 2 open)",
+)
+
+# Status codes worth retrying: request timeout, conflict, rate limit and server errors
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the provider while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Fails calls fast while the LLM provider looks unhealthy.
+
+    After `failure_threshold` consecutive transient failures the breaker opens
+    and rejects calls for `reset_timeout` seconds. It then lets a single probe
+    through (half-open): success closes it again, failure re-opens it.
+    """
+
+    CLOSED, HALF_OPEN, OPEN = 0, 1, 2
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    def _set_state(self, state: int):
+        self.state = state
+        LLM_CIRCUIT_STATE.set(state)
+
+    def is_open(self) -> bool:
+        """Whether calls are currently being rejected outright, without starting a probe."""
+        return self.state == self.OPEN and time.monotonic() - self.opened_at < self.reset_timeout
+
+    def before_call(self):
+        """Raise CircuitOpenError if the call must not be attempted."""
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                LLM_CIRCUIT_REJECTIONS.inc()
+                raise CircuitOpenError("LLM circuit breaker is open")
+            self._set_state(self.HALF_OPEN)
+        if self.state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                LLM_CIRCUIT_REJECTIONS.inc()
+                raise CircuitOpenError("LLM circuit breaker is half-open, waiting for the probe call")
+            self._probe_in_flight = True
+
+    def record_success(self):
+        self._probe_in_flight = False
+        self.failures = 0
+        if self.state != self.CLOSED:
+            logger.info("LLM circuit breaker closed")
+            self._set_state(self.CLOSED)
+
+    def record_failure(self):
+        self._probe_in_flight = False
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"LLM circuit breaker opened after {self.failures} consecutive failures")
+            self.opened_at = time.monotonic()
+            self._set_state(self.OPEN)
+
+    def release(self):
+        """End a call that says nothing about provider health (e.g. a bad request)."""
+        self._probe_in_flight = False
+
+
+def retry_reason(exc: BaseException) -> Optional[str]:
+    """Return a short label if `exc` is a transient failure worth retrying, else None."""
+    if isinstance(exc, asyncio.TimeoutError):
+        return "timeout"
+    if isinstance(exc, APIConnectionError):
+        return "connection"
+    if isinstance(exc, APIStatusError):
+        if exc.status_code in RETRYABLE_STATUS_CODES or exc.status_code >= 500:
+            return str(exc.status_code)
+    return None
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Read the delay requested by the server's Retry-After header, if any."""
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            value = headers["retry-after"]
+            try:
+                return float(value)
+            except ValueError:
+                retry_at = email.utils.parsedate_to_datetime(value)
+                return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff for the given (zero-based) attempt."""
+    ceiling = min(settings.LLM_RETRY_MAX_DELAY_SECONDS, settings.LLM_RETRY_BASE_DELAY_SECONDS * 2 ** attempt)
+    return random.uniform(0, ceiling)
+
+
+async def call_with_retries(call: Callable[[], Awaitable[T]], breaker: "CircuitBreaker") -> T:
+    """
+    Run `call` with a per-attempt deadline, retrying transient failures.
+
+    Attempts are limited to LLM_MAX_ATTEMPTS, each bounded by
+    LLM_ATTEMPT_TIMEOUT_SECONDS. Retries wait for the server's Retry-After
+    when given, and jittered exponential backoff otherwise; a Retry-After
+    longer than LLM_RETRY_MAX_DELAY_SECONDS is not waited for. Every attempt
+    passes through `breaker`.
+    """
+    attempts = max(settings.LLM_MAX_ATTEMPTS, 1)
+    for attempt in range(attempts):
+        breaker.before_call()
+        try:
+            result = await asyncio.wait_for(call(), timeout=settings.LLM_ATTEMPT_TIMEOUT_SECONDS)
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception as e:
+            reason = retry_reason(e)
+            if reason is None:
+                breaker.release()
+                raise
+            breaker.record_failure()
+            if attempt == attempts - 1:
+                raise
+            delay = retry_after_seconds(e)
+            if delay is None:
+                delay = backoff_delay(attempt)
+            elif delay > settings.LLM_RETRY_MAX_DELAY_SECONDS:
+                raise
+            LLM_RETRIES.inc(reason=reason)
+            logger.info(f"Retrying LLM call in {delay:.2f}s after {reason} (attempt {attempt + 1} of {attempts})")
+            await asyncio.sleep(delay)
+        else:
+            breaker.record_success()
+            return result
+
+
+llm_breaker = CircuitBreaker(
+    failure_threshold=settings.LLM_CIRCUIT_FAILURE_THRESHOLD,
+    reset_timeout=settings.LLM_CIRCUIT_RESET_SECONDS,
+)
@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from bson import ObjectId
+
+from app.config import settings
+from app.metrics import counter, histogram
+from app.services.answer_cache import normalize_question, prompt_hash
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+SEMANTIC_CACHE_LOOKUPS = counter(
+    "semantic_cache_lookups_total",
+    "Semantic answer cache lookups",
+    labels=("result",),
+)
+SEMANTIC_CACHE_SIMILARITY = histogram(
+    "semantic_cache_best_similarity",
+    "Cosine similarity of the nearest cached question on each lookup",
+    buckets=(0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.925, 0.95, 0.975, 1.0),
+)
+
+
+class SentenceTransformerEmbedder:
+    """Embedder backed by a sentence-transformers model that is already available locally."""
+
+    name = "sentence-transformers"
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def embed(self, text: str) -> List[float]:
+        return self.model.encode(text, normalize_embeddings=True).tolist()
+
+
+class SemanticAnswerCache:
+    """
+    Per-god cache of answers to curated questions, matched by embedding similarity.
+
+    Only answers to the god's curated (suggested) questions are added, so a hit
+    can never serve a reply written for another user's personal message; the
+    cache extends the exact answer cache to rewordings of those questions. Each
+    god has a fixed-capacity matrix of unit-length question embeddings; a
+    lookup is a single matrix-vector product, and the nearest question is a hit
+    if its cosine similarity reaches `threshold`, it hasn't expired and it was
+    answered with the god's current system prompt. When a god's matrix is full
+    the oldest entry is overwritten.
+    """
+
+    def __init__(self, embedder, threshold: float, max_entries_per_god: int, ttl_seconds: float):
+        self.embedder = embedder
+        self.threshold = threshold
+        self.capacity = max_entries_per_god
+        self.ttl_seconds = ttl_seconds
+        self._vectors: Dict[ObjectId, "np.ndarray"] = {}
+        self._entries: Dict[ObjectId, List[Optional[tuple]]] = {}
+        self._next_slot: Dict[ObjectId, int] = {}
+        self._lock = threading.Lock()
+        self._embed_cached = lru_cache(maxsize=1024)(self._embed)
+
+    def _embed(self, question: str) -> "np.ndarray":
+        return np.asarray(self.embedder.embed(question), dtype=np.float32)
+
+    async def embed(self, text: str) -> "np.ndarray":
+        question = normalize_question(text)
+        # Model inference is CPU-bound, keep it off the event loop
+        return await asyncio.get_running_loop().run_in_executor(None, self._embed_cached, question)
+
+    async def lookup(self, god_id: ObjectId, text: str, system_prompt: str) -> Optional[str]:
+        vectors = self._vectors.get(god_id)
+        if vectors is None:
+            SEMANTIC_CACHE_LOOKUPS.inc(result="miss")
+            return None
+        query = await self.embed(text)
+        with self._lock:
+            similarities = vectors @ query
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            entry = self._entries[god_id][best]
+        SEMANTIC_CACHE_SIMILARITY.observe(max(similarity, 0.0))
+        if (
+            entry is None
+            or similarity < self.threshold
+            or entry[1] != prompt_hash(system_prompt)
+            or entry[2] <= time.monotonic()
+        ):
+            SEMANTIC_CACHE_LOOKUPS.inc(result="miss")
+            return None
+        SEMANTIC_CACHE_LOOKUPS.inc(result="hit")
+        return entry[0]
+
+    async def add(self, god_id: ObjectId, text: str, system_prompt: str, answer: str):
+        """Remember the answer to one of the god's curated questions; never call this with free-form user messages."""
+        vector = await self.embed(text)
+        with self._lock:
+            if god_id not in self._vectors:
+                self._vectors[god_id] = np.zeros((self.capacity, len(vector)), dtype=np.float32)
+                self._entries[god_id] = [None] * self.capacity
+                self._next_slot[god_id] = 0
+            slot = self._next_slot[god_id]
+            self._vectors[god_id][slot] = vector
+            self._entries[god_id][slot] = (answer, prompt_hash(system_prompt), time.monotonic() + self.ttl_seconds)
+            self._next_slot[god_id] = (slot + 1) % self.capacity
+
+    def clear(self):
+        with self._lock:
+            self._vectors.clear()
+            self._entries.clear()
+            self._next_slot.clear()
+
+
+def create_semantic_cache() -> Optional[SemanticAnswerCache]:
+    """Build the semantic cache if it is enabled and its dependencies are available."""
+    if not settings.SEMANTIC_CACHE_ENABLED:
+        return None
+    if not settings.ANSWER_CACHE_ENABLED:
+        # Curated questions are recognised by the answer cache, which this builds on
+        logger.warning("SEMANTIC_CACHE_ENABLED is set but ANSWER_CACHE_ENABLED is not, semantic cache disabled")
+        return None
+    if np is None:
+        logger.warning("SEMANTIC_CACHE_ENABLED is set but numpy is not installed, semantic cache disabled")
+        return None
+    # Lexical similarity matches negations and swapped names, so only a real embedding model will do
+    if not settings.SEMANTIC_CACHE_MODEL:
+        logger.warning("SEMANTIC_CACHE_ENABLED is set but SEMANTIC_CACHE_MODEL is empty, semantic cache disabled")
+        return None
+    try:
+        embedder = SentenceTransformerEmbedder(settings.SEMANTIC_CACHE_MODEL)
+    except Exception as e:
+        logger.warning(f"Could not load embedding model {settings.SEMANTIC_CACHE_MODEL}, semantic cache disabled: {str(e)}")
+        return None
+    logger.info(f"Semantic answer cache enabled with the {settings.SEMANTIC_CACHE_MODEL} model")
+    return SemanticAnswerCache(
+        embedder,
+        threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+        max_entries_per_god=settings.SEMANTIC_CACHE_MAX_ENTRIES_PER_GOD,
+        ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS,
+    )
+
+
+# Built by the FastAPI lifespan handler (see main.py) rather than on import, so
+# scripts that import the routers don't load the embedding model
+semantic_cache: Optional[SemanticAnswerCache] = None
+
+def init_semantic_cache() -> Optional[SemanticAnswerCache]:
+    global semantic_cache
+    if semantic_cache is None:
+        semantic_cache = create_semantic_cache()
+    return semantic_cache
+
+def get_semantic_cache() -> Optional[SemanticAnswerCache]:
+    """Return the semantic cache, or None if it is disabled or the lifespan hasn't built it."""
+    return semantic_cache
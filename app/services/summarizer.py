@@ -0,0 +1,135 @@
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+
+from app.config import settings
+from app.services.context_builder import estimate_prompt_tokens
+from app.services.llm_limiter import llm_limiter
+from app.services.llm_providers import get_provider
+from app.services.resilience import call_with_retries, llm_breaker
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_INSTRUCTIONS = (
+    "You maintain a running summary of a conversation between a devotee and a god. "
+    "Merge the new messages into the existing summary. Keep names, personal details, "
+    "questions the devotee asked and guidance already given. Write in the third person, "
+    "in at most 200 words, and return only the updated summary."
+)
+
+
+def system_prompt_with_summary(system_prompt: str, summary: Optional[str]) -> str:
+    """Append the conversation's running summary, if any, to the god's system prompt."""
+    if not summary:
+        return system_prompt
+    return f"{system_prompt}\n\nSummary of your earlier conversation with this devotee:\n{summary}"
+
+
+async def summarize(previous_summary: Optional[str], messages: List[Dict[str, Any]]) -> Optional[str]:
+    """
+    Fold `messages` into `previous_summary` using the LLM provider.
+
+    Returns None if the provider fails, so an apology is never stored as a summary.
+    The call goes through the same retries and circuit breaker as chat replies.
+    """
+    transcript = "\n".join(
+        f"{'Devotee' if message.get('is_from_user', True) else 'God'}: {message['content']}"
+        for message in messages
+        if not message.get("is_fallback")
+    )
+    prompt = f"Existing summary:\n{previous_summary or '(none)'}\n\nNew messages:\n{transcript}"
+    messages = [{"role": "user", "content": prompt}]
+    if llm_breaker.is_open():
+        # Don't take an admission slot for a call the breaker will reject
+        return None
+    try:
+        # Summaries share the LLM budget with chat replies
+        async with llm_limiter.admitted(estimate_prompt_tokens(SUMMARY_INSTRUCTIONS, messages) + settings.CHAT_SUMMARY_MAX_TOKENS):
+            summary = await call_with_retries(
+                lambda: get_provider().complete(
+                    [{"role": "system", "content": SUMMARY_INSTRUCTIONS}] + messages,
+                    max_tokens=settings.CHAT_SUMMARY_MAX_TOKENS,
+                    temperature=0.2,
+                ),
+                llm_breaker,
+            )
+        return summary.strip() or None
+    except Exception as e:
+        logger.warning(f"Failed to summarise conversation: {str(e)}")
+        return None
+
+
+def history_messages_per_turn() -> int:
+    """Stored messages sent to the LLM on each turn, besides the new user message."""
+    return max(settings.CHAT_HISTORY_WINDOW, 1) - 1
+
+
+def summary_keep_recent() -> int:
+    """Newest messages left out of the summary; they must all fit in the history window."""
+    return max(0, min(settings.CHAT_SUMMARY_KEEP_RECENT, history_messages_per_turn()))
+
+
+def check_summary_settings():
+    """Warn at startup if CHAT_SUMMARY_KEEP_RECENT doesn't fit in the history window."""
+    if settings.CHAT_SUMMARY_KEEP_RECENT > history_messages_per_turn():
+        logger.warning(
+            f"CHAT_SUMMARY_KEEP_RECENT ({settings.CHAT_SUMMARY_KEEP_RECENT}) is larger than CHAT_HISTORY_WINDOW - 1 "
+            f"({history_messages_per_turn()}); using {summary_keep_recent()} so no messages are left out of both"
+        )
+
+
+async def update_conversation_summary(db, conv_oid: ObjectId):
+    """
+    Fold older messages into the conversation's running summary once they drop out of the history window.
+
+    Runs after the response has been sent. As soon as more unsummarised messages
+    exist than a turn sends to the LLM, all but the newest
+    CHAT_SUMMARY_KEEP_RECENT are summarised, CHAT_SUMMARY_BATCH_MESSAGES at a
+    time, so every message is either in the summary or in the window. The
+    summary is only written if no other worker updated it in the meantime.
+    """
+    try:
+        conversation = await db["conversations"].find_one(
+            {"_id": conv_oid},
+            {"summary": 1, "summary_until": 1},
+        )
+        if not conversation:
+            return
+        summary = conversation.get("summary")
+        summary_until = conversation.get("summary_until")
+        while True:
+            message_filter = {"conversation_id": conv_oid}
+            if summary_until:
+                message_filter["created_at"] = {"$gt": summary_until}
+
+            unsummarized = await db["messages"].count_documents(message_filter)
+            if unsummarized <= history_messages_per_turn():
+                return
+
+            batch_size = min(unsummarized - summary_keep_recent(), max(settings.CHAT_SUMMARY_BATCH_MESSAGES, 1))
+            messages = await db["messages"].find(
+                message_filter,
+                {"content": 1, "is_from_user": 1, "is_fallback": 1, "created_at": 1},
+            ).sort("created_at", 1).limit(batch_size).to_list(length=batch_size)
+            if not messages:
+                return
+
+            new_summary = await summarize(summary, messages)
+            if not new_summary:
+                return
+            result = await db["conversations"].update_one(
+                {"_id": conv_oid, "summary_until": summary_until},
+                {"$set": {
+                    "summary": new_summary,
+                    "summary_until": messages[-1]["created_at"],
+                    "summary_updated_at": datetime.utcnow(),
+                }},
+            )
+            if result.modified_count == 0:
+                # Another worker got there first and will carry on from its own summary
+                return
+            summary, summary_until = new_summary, messages[-1]["created_at"]
+    except Exception as e:
+        logger.warning(f"Failed to update summary for conversation {conv_oid}: {str(e)}")
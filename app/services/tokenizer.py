@@ -0,0 +1,44 @@
+import logging
+import math
+from functools import lru_cache
+from typing import Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Approximate characters per token for English text, used when tiktoken or its
+# encoding files are unavailable
+CHARS_PER_TOKEN = 4
+
+@lru_cache(maxsize=8)
+def _get_encoding(model: str):
+    """Load (once per model) the tiktoken encoding, or None if it can't be loaded."""
+    try:
+        import tiktoken
+    except ImportError:
+        logger.warning("tiktoken is not installed, estimating token counts from text length")
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # tiktoken downloads encoding files on first use, which fails offline
+        logger.warning(f"Could not load tiktoken encoding for {model}, estimating token counts from text length: {str(e)}")
+        return None
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Count the tokens `text` takes up for the given model (OPENAI_MODEL by default)."""
+    if not text:
+        return 0
+    encoding = _get_encoding(model or settings.OPENAI_MODEL)
+    if encoding is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+@lru_cache(maxsize=256)
+def count_prompt_tokens(text: str) -> int:
+    """count_tokens for system prompts, which repeat on every turn and are worth memoising."""
+    return count_tokens(text)
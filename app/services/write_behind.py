@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.config import settings
+from app.metrics import counter, gauge, histogram
+
+logger = logging.getLogger(__name__)
+
+WRITE_BEHIND_QUEUE_DEPTH = gauge(
+    "reply_write_behind_queue_depth",
+    "God replies waiting to be written",
+)
+WRITE_BEHIND_REPLIES = counter(
+    "reply_write_behind_replies_total",
+    "God replies handled by the write-behind queue",
+    labels=("result",),
+)
+WRITE_BEHIND_FLUSH_SECONDS = histogram(
+    "reply_write_behind_flush_seconds",
+    "Time taken to write one batch of god replies",
+)
+
+# Retries back off exponentially from RETRY_BASE_DELAY_SECONDS, with full jitter
+RETRY_BASE_DELAY_SECONDS = 0.5
+RETRY_MAX_DELAY_SECONDS = 10.0
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+class ReplyWriteBehindQueue:
+    """
+    In-process write-behind queue for god replies.
+
+    `enqueue` accepts a reply message document and returns straight away. A
+    worker task writes queued replies in batches: one `insert_many` into
+    `messages` and one `bulk_write` bumping each conversation's `updated_at`.
+    A batch is written once `batch_size` replies are waiting, or
+    `flush_interval` seconds after the first one arrives.
+
+    Failed batches are retried up to `max_attempts` times. Message ids are
+    assigned when a reply is enqueued, so a retry of a partly written batch
+    only hits duplicate key errors for the messages that already made it.
+    `drain()` stops accepting replies and writes everything still queued; it
+    runs on shutdown. Replies still queued when the process dies are lost, and
+    a reply isn't visible to readers until its batch has been written.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float, max_queue: int, max_attempts: int):
+        self.batch_size = max(batch_size, 1)
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.max_attempts = max(max_attempts, 1)
+        self._pending: Deque[Tuple[object, dict]] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_now: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._closed = True
+
+    def start(self):
+        """Start the worker task; until this is called `enqueue` refuses every reply."""
+        self._closed = False
+        self._wakeup = asyncio.Event()
+        self._flush_now = asyncio.Event()
+        self._worker = asyncio.create_task(self._run())
+
+    def enqueue(self, db, message_doc: dict) -> bool:
+        """
+        Queue a god reply message document for writing.
+
+        Returns False, without queueing it, if the queue isn't running or is
+        full; the caller should then write the reply itself.
+        """
+        if self._closed or self._worker is None or self._worker.done() or len(self._pending) >= self.max_queue:
+            WRITE_BEHIND_REPLIES.inc(result="refused")
+            return False
+        message_doc.setdefault("_id", ObjectId())
+        self._pending.append((db, message_doc))
+        WRITE_BEHIND_QUEUE_DEPTH.set(len(self._pending))
+        self._wakeup.set()
+        if len(self._pending) >= self.batch_size:
+            self._flush_now.set()
+        return True
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            if not self._flush_now.is_set():
+                # Give a batch the chance to fill up; a full batch or drain() cuts this short
+                try:
+                    await asyncio.wait_for(self._flush_now.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            if not self._closed:
+                self._flush_now.clear()
+            await self._flush_pending()
+            if self._closed:
+                return
+
+    async def _flush_pending(self):
+        while self._pending:
+            batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+            WRITE_BEHIND_QUEUE_DEPTH.set(len(self._pending))
+            await self._write_with_retries(batch)
+
+    async def _write_with_retries(self, batch):
+        for attempt in range(self.max_attempts):
+            started_at = time.perf_counter()
+            try:
+                await self._write(batch)
+            except Exception as e:
+                if attempt == self.max_attempts - 1:
+                    WRITE_BEHIND_REPLIES.inc(len(batch), result="dropped")
+                    logger.error(f"Dropping {len(batch)} god replies after {self.max_attempts} failed write attempts: {str(e)}")
+                    return
+                WRITE_BEHIND_REPLIES.inc(len(batch), result="retried")
+                logger.warning(f"Failed to write {len(batch)} god replies, retrying (attempt {attempt + 1} of {self.max_attempts}): {str(e)}")
+                await asyncio.sleep(random.uniform(0, min(RETRY_MAX_DELAY_SECONDS, RETRY_BASE_DELAY_SECONDS * 2 ** attempt)))
+            else:
+                WRITE_BEHIND_FLUSH_SECONDS.observe(time.perf_counter() - started_at)
+                WRITE_BEHIND_REPLIES.inc(len(batch), result="written")
+                return
+
+    async def _write(self, batch):
+        docs_by_db = {}
+        for db, doc in batch:
+            docs_by_db.setdefault(id(db), (db, []))[1].append(doc)
+        for db, docs in docs_by_db.values():
+            try:
+                await db["messages"].insert_many(docs, ordered=False)
+            except BulkWriteError as e:
+                # On a retry, messages written by an earlier attempt come back as duplicates
+                details = e.details or {}
+                if details.get("writeConcernErrors") or any(
+                    error.get("code") != DUPLICATE_KEY_ERROR for error in details.get("writeErrors", [])
+                ):
+                    raise
+            updated_at = {}
+            for doc in docs:
+                conv_oid = doc["conversation_id"]
+                updated_at[conv_oid] = max(updated_at.get(conv_oid, doc["created_at"]), doc["created_at"])
+            # $max keeps updated_at from moving backwards if a batch lands late
+            await db["conversations"].bulk_write(
+                [UpdateOne({"_id": conv_oid}, {"$max": {"updated_at": when}}) for conv_oid, when in updated_at.items()],
+                ordered=False,
+            )
+
+    async def drain(self, timeout: float):
+        """Stop accepting replies and wait up to `timeout` seconds for the queued ones to be written."""
+        self._closed = True
+        if self._worker is None:
+            return
+        if self._worker.done():
+            # The worker shouldn't die, but don't leave its replies behind if it did
+            self._worker = asyncio.create_task(self._flush_pending())
+        self._wakeup.set()
+        self._flush_now.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._worker), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Gave up draining the reply write-behind queue with {len(self._pending)} replies still queued")
+            self._worker.cancel()
+        self._worker = None
+
+
+reply_writer = ReplyWriteBehindQueue(
+    batch_size=settings.REPLY_WRITE_BEHIND_BATCH_SIZE,
+    flush_interval=settings.REPLY_WRITE_BEHIND_FLUSH_INTERVAL_SECONDS,
+    max_queue=settings.REPLY_WRITE_BEHIND_MAX_QUEUE,
+    max_attempts=settings.REPLY_WRITE_BEHIND_MAX_ATTEMPTS,
+)
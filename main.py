@@ -1,7 +1,23 @@
 import uvicorn
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from app.config import settings
+from app.database import connect_to_mongo, close_mongo_connection
+from app.indexes import ensure_indexes
+from app.metrics import registry
+from app.middleware import MetricsMiddleware
+from app.serialization import FastJSONResponse
+from app.services.god_catalog import god_catalog
+from app.services.question_catalog import question_catalog
+from app.services.answer_cache import answer_cache
+from app.services.password_service import password_hasher
+from app.services.summarizer import check_summary_settings
+from app.services.write_behind import reply_writer
+from app.services.llm_providers import init_openai_client, close_openai_client
+from app.services.semantic_cache import init_semantic_cache
 import logging
 
 from app.routers import auth, conversations, gods, questions, feedback
@@ -10,10 +26,52 @@ from app.routers import auth, conversations, gods, questions, feedback
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.CHAT_SUMMARY_ENABLED:
+        check_summary_settings()
+    # Create the database, HTTP and password hashing pools for this worker
+    db = connect_to_mongo()
+    init_openai_client()
+    password_hasher.start()
+    # Load the embedding model, if the semantic cache is enabled, before the warm-up uses it
+    init_semantic_cache()
+    # Build indexes in the background so a large collection can't delay startup
+    index_task = None
+    if settings.MONGODB_ENSURE_INDEXES:
+        index_task = asyncio.create_task(ensure_indexes(db))
+    # Warm the god and question catalogues so the first requests don't pay for loading them
+    try:
+        await god_catalog.load(db)
+    except Exception as e:
+        logger.error(f"Failed to load god catalogue at startup, it will be loaded on first use: {str(e)}")
+    try:
+        await question_catalog.load(db)
+    except Exception as e:
+        logger.error(f"Failed to load question catalogue at startup, it will be loaded on first use: {str(e)}")
+    # Optionally pre-compute answers to the suggested questions (this spends LLM tokens)
+    warm_task = None
+    if settings.ANSWER_CACHE_ENABLED and settings.ANSWER_CACHE_WARM_ON_STARTUP:
+        warm_task = asyncio.create_task(answer_cache.warm(db, settings.ANSWER_CACHE_WARM_CONCURRENCY))
+    if settings.REPLY_WRITE_BEHIND_ENABLED:
+        reply_writer.start()
+    yield
+    # Write any queued god replies while the database connection is still open
+    if settings.REPLY_WRITE_BEHIND_ENABLED:
+        await reply_writer.drain(settings.REPLY_WRITE_BEHIND_DRAIN_TIMEOUT_SECONDS)
+    for task in (index_task, warm_task):
+        if task and not task.done():
+            task.cancel()
+    password_hasher.shutdown()
+    await close_openai_client()
+    close_mongo_connection()
+
 app = FastAPI(
     title="God Talk API",
     description="An API for having conversations with different Gods using ChatGPT",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
 # Configure CORS
@@ -23,8 +81,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let browser clients read the pagination cursor
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Record per-route latency and in-flight requests for /metrics
+app.add_middleware(MetricsMiddleware)
+
 # Include routers with /api prefix
 logger.info("Including routers...")
 app.include_router(auth.router, prefix="/api")
@@ -38,5 +101,10 @@ logger.info("All routers included")
 def read_root():
     return {"message": "Welcome to God Talk API. Use /docs to view the API documentation."}
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Expose this worker's metrics in the Prometheus text format."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
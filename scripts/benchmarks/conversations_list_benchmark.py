@@ -0,0 +1,145 @@
+import asyncio
+import argparse
+import json
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from fastapi import Response
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.config import settings
+from app.routers.conversations import get_conversations, conversation_doc_to_schema
+from app.routers.gods import god_doc_to_schema
+from app.schemas import User as UserSchema
+
+# Benchmarks GET /api/conversations for a user with many conversations, comparing
+# the previous per-conversation queries against the current implementation.
+#
+# Run from the repository root against a disposable MongoDB instance:
+#   python -m scripts.benchmarks.conversations_list_benchmark --conversations 150
+#
+# Data is written to a throwaway database which is dropped afterwards.
+
+async def legacy_get_conversations(db, current_user, skip=0, limit=100):
+    """The N+1 implementation that get_conversations used to have."""
+    cursor = db["conversations"].find({"user_id": ObjectId(current_user.id)}).sort("updated_at", -1).skip(skip).limit(limit)
+    conversations = [doc async for doc in cursor]
+    result = []
+    for conv in conversations:
+        msg_count = await db["messages"].count_documents({"conversation_id": conv["_id"]})
+        if msg_count > 0:
+            god = await db["gods"].find_one({"_id": conv["god_id"]})
+            if god:
+                result.append(conversation_doc_to_schema(conv, god=god_doc_to_schema(god)))
+            else:
+                result.append(conversation_doc_to_schema(conv))
+    return result
+
+async def current_get_conversations(db, current_user, limit=100):
+    """The current endpoint, decoding its rendered response."""
+    response = await get_conversations(response=Response(), skip=0, limit=limit, db=db, current_user=current_user)
+    return json.loads(response.body)
+
+async def seed(db, conversations, messages_per_conversation):
+    gods = [
+        {"name": f"God {i}", "description": "Benchmark god", "system_prompt": "You are a god.", "religion": "Benchmark", "created_at": datetime.utcnow()}
+        for i in range(10)
+    ]
+    god_ids = (await db["gods"].insert_many(gods)).inserted_ids
+    user_id = (await db["users"].insert_one({
+        "username": "benchmark",
+        "email": "benchmark@example.com",
+        "hashed_password": "",
+        "is_active": True,
+        "created_at": datetime.utcnow(),
+    })).inserted_id
+
+    now = datetime.utcnow()
+    conv_docs = [
+        {
+            "title": f"Conversation {i}",
+            "user_id": user_id,
+            "god_id": god_ids[i % len(god_ids)],
+            "created_at": now - timedelta(minutes=i),
+            "updated_at": now - timedelta(minutes=i),
+        }
+        for i in range(conversations)
+    ]
+    conv_ids = (await db["conversations"].insert_many(conv_docs)).inserted_ids
+
+    # Leave every tenth conversation empty so the message filter has work to do
+    message_docs = [
+        {
+            "conversation_id": conv_id,
+            "content": f"Message {j}",
+            "is_from_user": j % 2 == 0,
+            "created_at": now + timedelta(seconds=j),
+        }
+        for i, conv_id in enumerate(conv_ids) if i % 10 != 0
+        for j in range(messages_per_conversation)
+    ]
+    if message_docs:
+        await db["messages"].insert_many(message_docs)
+    await db["messages"].create_index([("conversation_id", 1), ("created_at", 1)])
+    await db["conversations"].create_index([("user_id", 1), ("updated_at", -1)])
+
+    return UserSchema(
+        id=str(user_id),
+        username="benchmark",
+        email="benchmark@example.com",
+        is_active=True,
+        created_at=now,
+    )
+
+async def measure(label, func, iterations):
+    # Warm up connections and caches before timing
+    await func()
+    timings = []
+    for _ in range(iterations):
+        started_at = time.perf_counter()
+        await func()
+        timings.append((time.perf_counter() - started_at) * 1000)
+    timings.sort()
+    p50 = statistics.median(timings)
+    p95 = timings[min(len(timings) - 1, int(round(0.95 * (len(timings) - 1))))]
+    print(f"{label:<10} p50={p50:8.2f}ms  p95={p95:8.2f}ms  max={timings[-1]:8.2f}ms")
+    return p95
+
+async def run_benchmark(mongodb_uri, conversations, messages_per_conversation, iterations, limit):
+    client = AsyncIOMotorClient(mongodb_uri)
+    db_name = f"god_talk_bench_{uuid.uuid4().hex[:8]}"
+    db = client[db_name]
+    try:
+        print(f"Seeding {conversations} conversations with {messages_per_conversation} messages each into {db_name}...")
+        user = await seed(db, conversations, messages_per_conversation)
+
+        legacy = await legacy_get_conversations(db, user, limit=limit)
+        current = await current_get_conversations(db, user, limit=limit)
+        if [c.id for c in legacy] != [c["id"] for c in current]:
+            raise SystemExit("Implementations returned different conversations")
+        print(f"Both implementations return {len(current)} conversations\n")
+
+        before = await measure("before", lambda: legacy_get_conversations(db, user, limit=limit), iterations)
+        after = await measure("after", lambda: current_get_conversations(db, user, limit=limit), iterations)
+        print(f"\np95 speedup: {before / after:.1f}x")
+    finally:
+        await client.drop_database(db_name)
+        client.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark listing conversations for a user with many conversations.")
+    parser.add_argument("--mongodb-uri", default=settings.MONGODB_URI, help="MongoDB instance to run against")
+    parser.add_argument("--conversations", type=int, default=150, help="Number of conversations for the user")
+    parser.add_argument("--messages", type=int, default=20, help="Messages per non-empty conversation")
+    parser.add_argument("--iterations", type=int, default=50, help="Timed requests per implementation")
+    parser.add_argument("--limit", type=int, default=100, help="Page size passed to the endpoint")
+
+    args = parser.parse_args()
+
+    asyncio.run(run_benchmark(args.mongodb_uri, args.conversations, args.messages, args.iterations, args.limit))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+import asyncio
+import argparse
+import json
+import logging
+import os
+import random
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+import httpx
+
+from app.config import settings
+
+# End-to-end load test for the API.
+#
+# Boots main:app in-process (lifespan included) against a throwaway MongoDB and
+# the fake LLM provider, drives a mix of login, list gods, list conversations
+# and chat traffic from concurrent virtual users, and reports throughput,
+# per-route latency percentiles and event-loop lag. Results are written as JSON
+# so runs from different commits can be compared:
+#
+#   python -m scripts.benchmarks.load_test --duration 30 --output before.json
+#   python -m scripts.benchmarks.load_test --duration 30 --compare before.json
+#
+# By default a temporary `mongod` is started from PATH; pass --mongodb-uri to
+# use an existing disposable instance instead. Either way the benchmark uses
+# its own database and drops it afterwards.
+
+TRAFFIC_MIX = {
+    "login": 5,
+    "list_gods": 25,
+    "list_conversations": 20,
+    "chat": 50,
+}
+
+PASSWORD = "benchmark-password"
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def summarize(values):
+    values = sorted(values)
+    return {
+        "p50": round(percentile(values, 0.50), 3),
+        "p95": round(percentile(values, 0.95), 3),
+        "p99": round(percentile(values, 0.99), 3),
+        "max": round(values[-1], 3) if values else 0.0,
+    }
+
+def current_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+@contextmanager
+def local_mongod():
+    """Start a throwaway mongod on a free port and yield its URI."""
+    mongod = shutil.which("mongod")
+    if not mongod:
+        raise SystemExit("mongod was not found on PATH; install MongoDB or pass --mongodb-uri")
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    dbpath = tempfile.mkdtemp(prefix="god_talk_bench_")
+    process = subprocess.Popen(
+        [mongod, "--dbpath", dbpath, "--port", str(port), "--bind_ip", "127.0.0.1", "--quiet"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        yield f"mongodb://127.0.0.1:{port}"
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+        shutil.rmtree(dbpath, ignore_errors=True)
+
+class EventLoopLagMonitor:
+    """Measures how late the event loop wakes up a task that sleeps for `interval` seconds."""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.lags_ms = []
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.lags_ms.append(max(0.0, (loop.time() - expected) * 1000))
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+class VirtualUser:
+    def __init__(self, client, index, seed):
+        self.client = client
+        self.username = f"bench_user_{index}"
+        self.rng = random.Random(f"{seed}-{index}")
+        self.headers = {}
+        self.conversation_ids = []
+
+    async def register(self, god_ids):
+        response = await self.client.post("/api/auth/register", json={
+            "username": self.username,
+            "email": f"{self.username}@example.com",
+            "password": PASSWORD,
+        })
+        response.raise_for_status()
+        await self.login()
+        # One conversation with every god, each started with a first message
+        for god_id in god_ids:
+            response = await self.client.post("/api/conversations/", headers=self.headers, json={"title": "Benchmark", "god_id": god_id})
+            response.raise_for_status()
+            conversation_id = response.json()["id"]
+            self.conversation_ids.append(conversation_id)
+            response = await self.client.post("/api/conversations/chat", headers=self.headers, json={"conversation_id": conversation_id, "message": "Namaste"})
+            response.raise_for_status()
+
+    async def login(self):
+        response = await self.client.post("/api/auth/token", data={"username": self.username, "password": PASSWORD})
+        if response.status_code == 200:
+            self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        return response
+
+    async def step(self, route):
+        if route == "login":
+            return await self.login()
+        if route == "list_gods":
+            return await self.client.get("/api/gods/", headers=self.headers)
+        if route == "list_conversations":
+            return await self.client.get("/api/conversations/", headers=self.headers)
+        if route == "chat":
+            return await self.client.post("/api/conversations/chat", headers=self.headers, json={
+                "conversation_id": self.rng.choice(self.conversation_ids),
+                "message": f"Please guide me, question {self.rng.randint(1, 1_000_000)}",
+            })
+        raise ValueError(route)
+
+async def drive_traffic(users, duration):
+    routes = list(TRAFFIC_MIX)
+    weights = [TRAFFIC_MIX[route] for route in routes]
+    latencies = {route: [] for route in routes}
+    errors = {route: 0 for route in routes}
+    deadline = time.perf_counter() + duration
+
+    async def run_user(user):
+        while time.perf_counter() < deadline:
+            route = user.rng.choices(routes, weights)[0]
+            started_at = time.perf_counter()
+            try:
+                response = await user.step(route)
+                failed = response.status_code >= 400
+            except Exception:
+                failed = True
+            latencies[route].append((time.perf_counter() - started_at) * 1000)
+            if failed:
+                errors[route] += 1
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(run_user(user) for user in users))
+    return latencies, errors, time.perf_counter() - started_at
+
+async def run_load_test(args, mongodb_uri):
+    # Configure the app before it is imported: isolated database, fake LLM
+    settings.MONGODB_URI = mongodb_uri
+    settings.DATABASE_NAME = f"god_talk_bench_{uuid.uuid4().hex[:8]}"
+    settings.LLM_PROVIDER = "fake"
+    settings.FAKE_LLM_LATENCY_MS = args.llm_latency_ms
+    settings.FAKE_LLM_TOKENS_PER_SECOND = args.llm_tokens_per_second
+    settings.FAKE_LLM_RESPONSE_TOKENS = args.llm_response_tokens
+    # Every virtual user shares one client IP and chats far faster than a person
+    settings.RATE_LIMIT_ENABLED = False
+
+    from main import app
+    from app import database
+    from init_db import GODS
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        db = database.db
+        try:
+            await db["gods"].insert_many([dict(god, created_at=datetime.utcnow()) for god in GODS])
+            god_ids = [str(doc["_id"]) async for doc in db["gods"].find({}, {"_id": 1})]
+
+            async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+                users = [VirtualUser(client, index, args.seed) for index in range(args.concurrency)]
+                print(f"Registering {len(users)} users with {len(god_ids)} conversations each...")
+                await asyncio.gather(*(user.register(god_ids) for user in users))
+
+                print(f"Driving traffic from {len(users)} concurrent users for {args.duration}s...")
+                monitor = EventLoopLagMonitor()
+                monitor.start()
+                latencies, errors, elapsed = await drive_traffic(users, args.duration)
+                await monitor.stop()
+        finally:
+            await database.client.drop_database(settings.DATABASE_NAME)
+
+    total_requests = sum(len(values) for values in latencies.values())
+    return {
+        "commit": current_commit(),
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "config": {
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "llm_latency_ms": args.llm_latency_ms,
+            "llm_tokens_per_second": args.llm_tokens_per_second,
+            "llm_response_tokens": args.llm_response_tokens,
+            "traffic_mix": TRAFFIC_MIX,
+        },
+        "throughput_rps": round(total_requests / elapsed, 2),
+        "requests": total_requests,
+        "routes": {
+            route: dict(
+                count=len(values),
+                errors=errors[route],
+                rps=round(len(values) / elapsed, 2),
+                **summarize(values),
+            )
+            for route, values in latencies.items()
+        },
+        "event_loop_lag_ms": summarize(monitor.lags_ms),
+    }
+
+def print_report(result, baseline=None):
+    def delta(current, previous):
+        if not previous:
+            return ""
+        change = (current - previous) / previous * 100
+        return f" ({change:+.1f}%)"
+
+    base_routes = baseline["routes"] if baseline else {}
+    print("\n" + "=" * 80)
+    print(f"Throughput: {result['throughput_rps']} req/s{delta(result['throughput_rps'], baseline and baseline['throughput_rps'])}")
+    print("-" * 80)
+    print(f"{'route':<20}{'count':>8}{'errors':>8}{'p50 ms':>16}{'p95 ms':>16}{'p99 ms':>16}")
+    for route, stats in result["routes"].items():
+        previous = base_routes.get(route, {})
+        print(
+            f"{route:<20}{stats['count']:>8}{stats['errors']:>8}"
+            f"{stats['p50']:>9.1f}{delta(stats['p50'], previous.get('p50')):>7}"
+            f"{stats['p95']:>9.1f}{delta(stats['p95'], previous.get('p95')):>7}"
+            f"{stats['p99']:>9.1f}{delta(stats['p99'], previous.get('p99')):>7}"
+        )
+    lag = result["event_loop_lag_ms"]
+    print("-" * 80)
+    print(f"Event loop lag: p50={lag['p50']}ms p99={lag['p99']}ms max={lag['max']}ms")
+    print("=" * 80)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run an in-process load test against the API.")
+    parser.add_argument("--mongodb-uri", help="Disposable MongoDB instance to use instead of starting a local mongod")
+    parser.add_argument("--concurrency", type=int, default=20, help="Number of concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of traffic to drive")
+    parser.add_argument("--llm-latency-ms", type=float, default=300, help="Fake LLM delay before the first token")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=50, help="Fake LLM token rate")
+    parser.add_argument("--llm-response-tokens", type=int, default=120, help="Fake LLM reply length in tokens")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for the traffic mix")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Baseline JSON results to compare against")
+
+    args = parser.parse_args()
+
+    # Keep per-request logging out of the way of the report
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    if args.mongodb_uri:
+        result = asyncio.run(run_load_test(args, args.mongodb_uri))
+    else:
+        with local_mongod() as mongodb_uri:
+            result = asyncio.run(run_load_test(args, mongodb_uri))
+
+    baseline = None
+    if args.compare and os.path.exists(args.compare):
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import asyncio
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import pytz
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.routers.conversations import conversation_doc_to_schema, message_doc_to_schema
+from app.routers.gods import god_doc_to_schema
+from app.schemas import Conversation as ConversationSchema, God as GodSchema, Message as MessageSchema
+from app.serialization import model_response
+
+# Benchmarks turning a conversation document and its messages into the body of
+# GET /api/conversations/{id}, comparing the previous path (pytz conversion,
+# validated schemas, FastAPI re-validating against response_model, stdlib json)
+# with the current one, and reports the cost per message.
+#
+# No database is needed; run from the repository root:
+#   python -m scripts.benchmarks.serialization_benchmark --messages 200
+
+IST = pytz.timezone('Asia/Kolkata')
+
+def legacy_to_ist(value):
+    if value.tzinfo is None:
+        value = pytz.utc.localize(value)
+    return value.astimezone(IST)
+
+def legacy_message_doc_to_schema(doc):
+    return MessageSchema(
+        id=str(doc["_id"]),
+        conversation_id=str(doc["conversation_id"]),
+        content=doc["content"],
+        is_from_user=doc.get("is_from_user", True),
+        created_at=legacy_to_ist(doc["created_at"]),
+        is_fallback=doc.get("is_fallback", False),
+    )
+
+def legacy_god_doc_to_schema(doc):
+    return GodSchema(
+        id=str(doc["_id"]),
+        name=doc["name"],
+        description=doc["description"],
+        system_prompt=doc.get("system_prompt"),
+        example_phrases=doc.get("example_phrases", []),
+        interaction_style=doc.get("interaction_style"),
+        personality_traits=doc.get("personality_traits", []),
+        image_url=doc.get("image_url"),
+        religion=doc["religion"],
+        created_at=legacy_to_ist(doc["created_at"]),
+    )
+
+def legacy_conversation_doc_to_schema(doc, messages, god):
+    return ConversationSchema(
+        id=str(doc["_id"]),
+        title=doc["title"],
+        user_id=str(doc["user_id"]),
+        god_id=str(doc["god_id"]),
+        created_at=legacy_to_ist(doc["created_at"]),
+        updated_at=legacy_to_ist(doc["updated_at"]),
+        messages=messages,
+        god=god,
+    )
+
+CONVERSATION_FIELD = create_response_field(name="conversation", type_=ConversationSchema)
+
+async def legacy_render(conv_doc, message_docs, god_doc):
+    """What the endpoint used to do, including FastAPI's response_model handling."""
+    conversation = legacy_conversation_doc_to_schema(
+        conv_doc,
+        [legacy_message_doc_to_schema(doc) for doc in message_docs],
+        legacy_god_doc_to_schema(god_doc),
+    )
+    content = await serialize_response(field=CONVERSATION_FIELD, response_content=conversation)
+    return JSONResponse(content).body
+
+async def current_render(conv_doc, message_docs, god_doc):
+    conversation = conversation_doc_to_schema(
+        conv_doc,
+        messages=[message_doc_to_schema(doc) for doc in message_docs],
+        god=god_doc_to_schema(god_doc),
+    )
+    return model_response(conversation).body
+
+def make_docs(messages):
+    now = datetime.utcnow().replace(microsecond=123000)
+    god_doc = {
+        "_id": ObjectId(),
+        "name": "Benchmark God",
+        "description": "Benchmark god",
+        "system_prompt": "You are a god.",
+        "example_phrases": ["Peace be with you"],
+        "personality_traits": ["wise", "patient"],
+        "religion": "Benchmark",
+        "created_at": now,
+    }
+    conv_doc = {
+        "_id": ObjectId(),
+        "title": "Benchmark conversation",
+        "user_id": ObjectId(),
+        "god_id": god_doc["_id"],
+        "created_at": now,
+        "updated_at": now,
+    }
+    message_docs = [
+        {
+            "_id": ObjectId(),
+            "conversation_id": conv_doc["_id"],
+            "content": f"Message {i}: " + "Tell me about the meaning of life. " * 4,
+            "is_from_user": i % 2 == 0,
+            "token_count": 40,
+            "created_at": now + timedelta(seconds=i),
+        }
+        for i in range(messages)
+    ]
+    return conv_doc, message_docs, god_doc
+
+async def measure(label, render, docs, iterations, messages):
+    # Warm up before timing
+    await render(*docs)
+    timings = []
+    for _ in range(iterations):
+        started_at = time.perf_counter()
+        await render(*docs)
+        timings.append((time.perf_counter() - started_at) * 1_000_000 / messages)
+    timings.sort()
+    p50 = statistics.median(timings)
+    p95 = timings[min(len(timings) - 1, int(round(0.95 * (len(timings) - 1))))]
+    print(f"{label:<10} p50={p50:8.2f}us/message  p95={p95:8.2f}us/message")
+    return p50
+
+async def run_benchmark(messages, iterations):
+    docs = make_docs(messages)
+    if json.loads(await legacy_render(*docs)) != json.loads(await current_render(*docs)):
+        raise SystemExit("Implementations rendered different responses")
+    print(f"Both implementations render the same conversation with {messages} messages\n")
+
+    before = await measure("before", legacy_render, docs, iterations, messages)
+    after = await measure("after", current_render, docs, iterations, messages)
+    print(f"\np50 speedup: {before / after:.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark serialising a conversation with its messages.")
+    parser.add_argument("--messages", type=int, default=200, help="Messages in the conversation")
+    parser.add_argument("--iterations", type=int, default=200, help="Timed renders per implementation")
+
+    args = parser.parse_args()
+
+    asyncio.run(run_benchmark(max(args.messages, 1), args.iterations))
+
+if __name__ == "__main__":
+    main()
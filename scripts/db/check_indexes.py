@@ -0,0 +1,45 @@
+import asyncio
+import argparse
+import sys
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.config import settings
+from app.indexes import ensure_indexes, find_collection_scans
+
+# Explains the filtered queries and aggregations the API issues and exits
+# non-zero if any of them would scan a whole collection, or targets a
+# collection that doesn't exist yet. Run from the repository root:
+#   python -m scripts.db.check_indexes --apply
+
+async def check_indexes(mongodb_uri, database_name, apply):
+    client = AsyncIOMotorClient(mongodb_uri)
+    db = client[database_name]
+    try:
+        if apply:
+            print("Ensuring indexes...")
+            await ensure_indexes(db)
+
+        offenders = await find_collection_scans(db)
+        if offenders:
+            print("❌ The following queries are not served by an index:")
+            for offender in offenders:
+                print(f"  - {offender}")
+            return 1
+
+        print("✅ Every query is served by an index")
+        return 0
+    finally:
+        client.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if any API query does a collection scan.")
+    parser.add_argument("--mongodb-uri", default=settings.MONGODB_URI, help="MongoDB instance to check")
+    parser.add_argument("--database", default=settings.DATABASE_NAME, help="Database to check")
+    parser.add_argument("--apply", action="store_true", help="Create the indexes from the manifest before checking")
+
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(check_indexes(args.mongodb_uri, args.database, args.apply)))
+
+if __name__ == "__main__":
+    main()